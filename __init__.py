@@ -1,456 +1,527 @@
+import os
 import bpy
+import concurrent.futures
+import json
+import hashlib
+import contextlib
 import bmesh
 import math
-from bpy.types import Operator
-from bpy.props import FloatVectorProperty, EnumProperty, FloatProperty, IntProperty
+import numpy as np
+from bpy.types import Operator, AddonPreferences, Panel, PropertyGroup
+from bpy_extras.io_utils import ExportHelper
+from bpy.props import FloatVectorProperty, EnumProperty, FloatProperty, IntProperty, BoolProperty, StringProperty, PointerProperty
 from mathutils import Vector, Matrix, Euler
+from mathutils.bvhtree import BVHTree
+from . import cache, nodes, library, profiling, motion
+from .geometry import JointGeometry, MeshData, NOZZLE_WIDTH, PRINT_ANGLE, pack_disjoint, solve, min_size, max_clearance, clear_primitives
 
-class HPaulsen_FDMJoint:
-    def __init__(self,type,size,up_angle,down_angle,horizontal_angle,clearance,resolution):
-        self.name = "FDM Joint"
-        self.type = type
-        self.size = size # min size ~ 2.9mm
-        self.resolution = resolution
-        
-        self.up_angle = up_angle
-        self.down_angle = down_angle
-        
-        self.clearance = clearance # 0.3 seems generous, but is about the minimum recommended
-        self.overlap = 0.3 #max(0.3,self.size/20) # each side
-        self.print_angle = math.radians(45) # don't change without verifying areas where this is assumed
-        self.a_step = 2*math.pi/resolution
-        self.half_arm_width = max(0.6,0.3*self.size/2)
-        self.wall_width = max(0.8,0.25*self.size/2)
-        self.bridgeable_r = 1.5 # max safe bridgeable distance
-        
-        self.axle_min_r = max(0.4,self.size/6) # the radius of the endpoint of the "ball"
-        self.axle_major_r = self.size/2 - self.clearance
-        self.axle_x = math.sqrt(math.pow(self.axle_major_r,2)-math.pow(self.axle_min_r,2))
-        self.axle_r = self.axle_min_r+(self.axle_x-self.half_arm_width)/math.tan(self.print_angle) #self.axle_min_r+self.overlap+self.clearance
-
-        self.v_clearance = 0.6 # clearance between axle and roof of socket
-        self.v_clearance_max = 2 # max clearance between axle and roof of socket
-        self.bottom = 1.5*self.size # how low to go, rather arbitrary - just has to be long enough to be below z=0
-        self.arm_length = self.size/2+self.wall_width+2*self.clearance#2*self.size
-        self.separator_outer_r = 2*self.size
-        self.separator_y = self.size/2+self.wall_width
-        
-        if self.axle_x-self.overlap < self.half_arm_width+self.clearance:
-            raise RuntimeError("FDMJoint: Axle size is too small and/or Clearance is too large")
-        
-        self.bendable_angle = math.asin((self.axle_x-self.overlap-self.half_arm_width)/(self.size/2+self.clearance))
-        if self.bendable_angle > horizontal_angle:
-            self.bendable_angle = horizontal_angle
-        elif self.bendable_angle < 0:
-            self.bendable_angle = 0
-            
-        self.bottom_r = self.axle_x-self.overlap
-        self.raise_z = 1.5*self.axle_r # somewhat arbitrary
-
-    def loopx(self,verts,r,x):
-        verts += [(x,r*math.sin(i*self.a_step),r*math.cos(i*self.a_step)) for i in range(self.resolution)]
-
-    def loopz(self,verts,r,z,yscale=1.0):
-        verts += [(r*math.sin(i*self.a_step),r*math.cos(i*self.a_step)*yscale,z) for i in range(self.resolution)]
-    
-    def loopy(self,verts,r,y):
-        verts += [(r*math.sin(i*self.a_step),y,r*math.cos(i*self.a_step)) for i in range(self.resolution)]
-        
-    def bridge_last_loop(self,verts,faces,reverse_normals=False):
-        vertslen = len(verts)
-        lastloopstart = vertslen-self.resolution
-        priorloopstart = lastloopstart-self.resolution
-        if not reverse_normals:
-            faces += [(priorloopstart+j+1,priorloopstart+j,lastloopstart+j,lastloopstart+j+1) for j in range(self.resolution-1)]
-            faces += [(priorloopstart,lastloopstart-1,vertslen-1,lastloopstart)]
-        else:
-            faces += [(lastloopstart+j+1,lastloopstart+j,priorloopstart+j,priorloopstart+j+1) for j in range(self.resolution-1)]
-            faces += [(lastloopstart,vertslen-1,lastloopstart-1,priorloopstart)]
-            
-    def bridge_to_point(self,verts,faces,reverse_normals=False):
-        if reverse_normals:
-            tip_vert = len(verts)-1
-            faces += [(tip_vert,tip_vert-self.resolution+i+1,tip_vert-self.resolution+i) for i in range(self.resolution-1)]
-            faces += [(tip_vert,tip_vert-self.resolution,tip_vert-1)]
+PREVIEW_RESOLUTION = 16
+
+def preferences():
+    addon = bpy.context.preferences.addons.get(__package__)
+    return addon.preferences if addon else None
+
+def library_directory():
+    # where finished joints are kept between sessions, None if the library is off
+    prefs = preferences()
+    if prefs is None or not prefs.use_library:
+        return None
+    if prefs.library_path:
+        directory = bpy.path.abspath(prefs.library_path)
+        os.makedirs(directory,exist_ok=True)
+        return directory
+    try:
+        return bpy.utils.extension_path_user(__package__,path="library",create=True)
+    except ValueError:
+        return None # not installed as an extension
+
+def profiling_enabled():
+    prefs = preferences()
+    return prefs is not None and prefs.profiling
+
+def library_size():
+    return preferences().library_size*1024*1024
+
+def fill_mesh(mesh_data,mesh):
+    # copy MeshData arrays into an empty mesh datablock in bulk
+    mesh_data.vertices.add(len(mesh.verts))
+    mesh_data.vertices.foreach_set("co",mesh.verts.ravel())
+    mesh_data.loops.add(len(mesh.loops))
+    mesh_data.loops.foreach_set("vertex_index",mesh.loops)
+    mesh_data.polygons.add(len(mesh.totals))
+    mesh_data.polygons.foreach_set("loop_start",mesh.starts)
+    mesh_data.update(calc_edges=True)
+    # True if the geometry was invalid and has been corrected
+    return mesh_data.validate()
+
+def mesh_to_data(mesh_data):
+    # copy a mesh datablock into MeshData arrays in bulk
+    verts = np.empty(len(mesh_data.vertices)*3,dtype=np.float32)
+    mesh_data.vertices.foreach_get("co",verts)
+    loops = np.empty(len(mesh_data.loops),dtype=np.int32)
+    mesh_data.loops.foreach_get("vertex_index",loops)
+    totals = np.empty(len(mesh_data.polygons),dtype=np.int32)
+    mesh_data.polygons.foreach_get("loop_total",totals)
+    return MeshData(verts,loops,totals)
+
+def placement_matrix(location,tangent=None,normal=None,align="NONE"):
+    # a joint's placement, its arm points along +Y and its top along +Z
+    rotation = Matrix.Identity(3)
+    if align == "TANGENT" and tangent is not None and tangent.xy.length > 1e-6:
+        # turn about Z only, so the joint stays upright for printing
+        rotation = Matrix.Rotation(math.atan2(-tangent.x,tangent.y),3,'Z')
+    elif align == "NORMAL" and normal is not None and normal.length > 1e-6:
+        z = normal.normalized()
+        y = tangent-tangent.dot(z)*z if tangent is not None else Vector()
+        if y.length < 1e-6:
+            rotation = z.to_track_quat('Z','Y').to_matrix()
         else:
-            tip_vert = len(verts)-self.resolution-1
-            faces += [(0,i,i+1) for i in range(1,self.resolution)]
-            faces += [(0,self.resolution,1)]
-            
-    def create_obj(self,verts,faces):
+            y.normalize()
+            rotation = Matrix((y.cross(z),y,z)).transposed()
+    return Matrix.Translation(location)@rotation.to_4x4()
+
+def empty_placements(objs,align):
+    # empties keep their own rotation unless the joints are not aligned
+    return [obj.matrix_world.normalized() if align != "NONE" else Matrix.Translation(obj.matrix_world.translation)
+            for obj in objs if obj.type == 'EMPTY']
+
+def vertex_placements(obj,align):
+    # at every vertex, oriented by its normal and its first edge
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices)*3,dtype=np.float32)
+    mesh.vertices.foreach_get("co",co)
+    normals = np.empty(len(mesh.vertices)*3,dtype=np.float32)
+    mesh.vertex_normals.foreach_get("vector",normals)
+    edges = np.empty(len(mesh.edges)*2,dtype=np.int32)
+    mesh.edges.foreach_get("vertices",edges)
+    # the other end of the first edge using each vertex, isolated vertices keep themselves
+    vertices,first = np.unique(edges,return_index=True)
+    neighbour = np.arange(len(mesh.vertices))
+    neighbour[vertices] = edges.reshape(-1,2)[:,::-1].ravel()[first]
+    co = co.reshape(-1,3)
+    normals = normals.reshape(-1,3)
+    matrix = obj.matrix_world
+    rotation = matrix.to_3x3()
+    normal_matrix = rotation.inverted_safe().transposed()
+    return [placement_matrix(matrix@Vector(co[i]),rotation@Vector(co[neighbour[i]]-co[i]),normal_matrix@Vector(normals[i]),align)
+            for i in range(len(co))]
+
+def curve_placements(obj,count,align,depsgraph):
+    # evenly spaced along the evaluated curve, oriented by its tangent with the top
+    # as close to +Z as the tangent allows
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    co = np.empty(len(mesh.vertices)*3,dtype=np.float64)
+    mesh.vertices.foreach_get("co",co)
+    edges = np.empty(len(mesh.edges)*2,dtype=np.int32)
+    mesh.edges.foreach_get("vertices",edges)
+    evaluated.to_mesh_clear()
+    if not len(edges) or count < 1:
+        return []
+    co = co.reshape(-1,3)@np.array(obj.matrix_world.to_3x3()).T+np.array(obj.matrix_world.translation)
+    edges = edges.reshape(-1,2)
+    starts = co[edges[:,0]]
+    directions = co[edges[:,1]]-starts
+    lengths = np.linalg.norm(directions,axis=1)
+    ends = np.cumsum(lengths)
+    distances = (np.arange(count)+0.5)*ends[-1]/count
+    segments = np.minimum(np.searchsorted(ends,distances),len(edges)-1)
+    t = 1-(ends[segments]-distances)/np.maximum(lengths[segments],1e-12)
+    points = starts[segments]+directions[segments]*t[:,None]
+    placements = []
+    for point,tangent in zip(points,directions[segments]):
+        tangent = Vector(tangent).normalized()
+        normal = Vector((0,0,1))-tangent.z*tangent
+        placements.append(placement_matrix(Vector(point),tangent,normal,align))
+    return placements
+
+CUTTERS_NAME = "FDM Joint Cutters"
+
+def joint_cutters(target,joints,depsgraph):
+    # the evaluated joints in the space of the target, merged into as few
+    # meshes as possible where they don't overlap
+    to_target = target.matrix_world.inverted_safe()
+    cutters = []
+    for joint in joints:
+        evaluated = joint.evaluated_get(depsgraph)
+        data = mesh_to_data(evaluated.to_mesh())
+        evaluated.to_mesh_clear()
+        matrix = to_target@joint.matrix_world
+        data = data.transformed(matrix.to_3x3(),matrix.translation)
+        cutters.append(data.flipped() if matrix.is_negative else data)
+    return pack_disjoint(cutters)
+
+def cut_joints(target,joints,solver='MANIFOLD'):
+    # apply a single boolean difference with all joints to the target's mesh after
+    # its enabled modifiers, which are applied with it like a Boolean modifier at
+    # the end of the stack would be; disabled modifiers are kept. Returns the number
+    # of cutters whose invalid geometry was corrected.
+    collection = bpy.data.collections.new(CUTTERS_NAME)
+    bpy.context.scene.collection.children.link(collection)
+    corrected = 0
+    for cutter in joint_cutters(target,joints,bpy.context.evaluated_depsgraph_get()):
+        obj = bpy.data.objects.new(CUTTERS_NAME,bpy.data.meshes.new(CUTTERS_NAME))
+        corrected += fill_mesh(obj.data,cutter)
+        obj.matrix_world = target.matrix_world
+        collection.objects.link(obj)
+
+    enabled = [modifier.name for modifier in target.modifiers if modifier.show_viewport]
+    bool = target.modifiers.new(name="fdm_joints",type='BOOLEAN')
+    bool.operation = 'DIFFERENCE'
+    bool.operand_type = 'COLLECTION'
+    bool.collection = collection
+    bool.solver = solver
+    try:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        mesh_data = bpy.data.meshes.new_from_object(target.evaluated_get(depsgraph),depsgraph=depsgraph)
+    finally:
+        target.modifiers.remove(bool)
+        for operand in collection.objects[:]:
+            operand_data = operand.data
+            bpy.data.objects.remove(operand)
+            bpy.data.meshes.remove(operand_data)
+        bpy.data.collections.remove(collection)
+
+    for name in enabled:
+        target.modifiers.remove(target.modifiers[name])
+    old_data = target.data
+    name = old_data.name
+    target.data = mesh_data
+    if old_data.users == 0:
+        bpy.data.meshes.remove(old_data)
+    mesh_data.name = name
+    return corrected
+
+def report_corrected(operator,joints):
+    # one warning for the meshes of these joints whose invalid geometry was corrected
+    corrected = sum(joint.corrected for joint in joints)
+    if corrected:
+        operator.report({'WARNING'},f"FDMJoint: {corrected} joint meshes had invalid geometry which was corrected")
+
+def find_cutter_modifier(target):
+    # the Boolean modifier added by cutter_modifier, Blender adds a number to its
+    # name if another modifier already had it
+    for modifier in target.modifiers:
+        name = modifier.name
+        if modifier.type == 'BOOLEAN' and (name == CUTTERS_NAME or name.startswith(CUTTERS_NAME+".") and name[len(CUTTERS_NAME)+1:].isdigit()):
+            return modifier
+    return None
+
+def cutter_modifier(target,joints,solver='MANIFOLD'):
+    # one boolean modifier with all joints in a collection as its operand, joints
+    # added later go into the same collection
+    bool = find_cutter_modifier(target)
+    if bool is None:
+        bool = target.modifiers.new(name=CUTTERS_NAME,type='BOOLEAN')
+        bool.operation = 'DIFFERENCE'
+        bool.solver = solver
+    # repair a modifier whose collection was removed or that was switched to an object
+    bool.operand_type = 'COLLECTION'
+    if bool.collection is None:
+        collection = bpy.data.collections.new(CUTTERS_NAME)
+        bpy.context.scene.collection.children.link(collection)
+        bool.collection = collection
+    for joint in joints:
+        if joint.name not in bool.collection.objects:
+            bool.collection.objects.link(joint)
+    return bool
+
+class HPaulsen_FDMJoint(JointGeometry):
+    name = "FDM Joint"
+    use_bmesh = False # build meshes one element at a time, only useful for debugging
+    degenerate_threshold = 0.001 # edges and faces smaller than this are dissolved after the booleans
+    merge_distance = 0.0001 # vertices closer than this are merged after the booleans
+    profile = None # a profiling.Profile while a profiled joint is generated
+    planar_angle = math.radians(0.5) # faces closer to coplanar than this are merged by the reduction
+    reduce_steps = 7 # decimation ratios tried by the reduction
+    reduce_stats = None
+    corrected = 0 # meshes of this joint whose invalid geometry fill_mesh corrected
+
+    def __init__(self,*args,reduction=0.0,preview=False,**kwargs):
+        # reduction is the maximum deviation of the reduced joint as a fraction
+        # of the clearance, 0 doesn't reduce. Preview joints bypass the joint library.
+        super().__init__(*args,**kwargs)
+        self.reduction = reduction
+        self.preview = preview
+
+    def cache_key(self):
+        return super().cache_key()+(round(self.reduction,6),)
+
+    def params(self):
+        params = super().params()
+        params["reduction"] = self.reduction
+        return params
+
+    def create_obj(self,mesh,collection=None):
         mesh_data = bpy.data.meshes.new(f"{self.name}_data")
         mesh_obj = bpy.data.objects.new(self.name,mesh_data)
-        bpy.context.scene.collection.objects.link(mesh_obj)
+        (collection or bpy.context.scene.collection).objects.link(mesh_obj)
+        if not self.use_bmesh:
+            self.corrected += fill_mesh(mesh_data,mesh)
+            return mesh_obj
         bm = bmesh.new()
-        for coord in verts:
+        for coord in mesh.verts.tolist():
             bm.verts.new(coord)
         bm.verts.ensure_lookup_table()
-        for indices in faces:
+        for indices in mesh.faces():
             bm.faces.new([bm.verts[index] for index in indices])
         bm.to_mesh(mesh_data)
         mesh_data.update()
         bm.free()
         return mesh_obj
     
-    def add_socket(self):
-        verts = []
-        faces = []
-
-        bottom = -self.axle_min_r-self.size/2
-        verts += [(0,0,bottom)]
-        self.loopz(verts,self.size/2,-self.axle_min_r)
-        self.bridge_to_point(verts,faces)
-        self.loopz(verts,self.size/2,self.axle_min_r)
-        self.bridge_last_loop(verts,faces)
-        
-        top = self.axle_r+self.v_clearance
-        topr = self.size/2-(top-self.axle_min_r)
-        if topr > self.bridgeable_r:
-            d = topr-self.bridgeable_r
-            topr = self.bridgeable_r
-            if d > self.v_clearance_max:
-                top = self.axle_r+self.v_clearance_max
-                topr = self.size/2-(top-self.axle_min_r)
-            else:
-                top += d
-                topr = self.bridgeable_r
-            
-        self.loopz(verts,topr,top)
-        self.bridge_last_loop(verts,faces)
-        faces += [(len(verts)-1-i for i in range(self.resolution))]
-            
-        return self.create_obj(verts,faces)
-        
-    def add_axle(self):
-        verts = []
-        faces = []
-        
-        straight_x = self.axle_x-(self.axle_r-self.axle_min_r)
-        straight_x = max(straight_x,self.half_arm_width+0.0001)
-        
-        self.loopx(verts,self.axle_min_r,-self.axle_x)
-        faces += [range(self.resolution)]
-        self.loopx(verts,self.axle_r,-straight_x)
-        self.bridge_last_loop(verts,faces)
-        self.loopx(verts,self.axle_r,-self.half_arm_width)
-        self.bridge_last_loop(verts,faces)
-        l = len(verts)
-        for i in range(l-self.resolution,l):
-            if verts[i][2] < 0:
-                verts[i] = (verts[i][0],verts[i][1],verts[i][2]-verts[i][0]-straight_x)
-        self.loopx(verts,self.axle_r,self.half_arm_width)
-        self.bridge_last_loop(verts,faces)
-        l = len(verts)
-        for i in range(l-self.resolution,l):
-            if verts[i][2] < 0:
-                verts[i] = (verts[i][0],verts[i][1],verts[i][2]+verts[i][0]-straight_x)
-        self.loopx(verts,self.axle_r,straight_x)
-        self.bridge_last_loop(verts,faces)
-        self.loopx(verts,self.axle_min_r,self.axle_x)
-        self.bridge_last_loop(verts,faces)
-        faces += [(len(verts)-1-i for i in range(self.resolution))]
-        
-        return self.create_obj(verts,faces)
-        
-    def add_arm(self):
-        verts = []
-        faces = []
-        
-        x = self.half_arm_width
-        
-        verts += [(-x,0,self.axle_min_r),(x,0,self.axle_min_r),(-x,self.arm_length,self.axle_min_r),(x,self.arm_length,self.axle_min_r)]
-        faces += [(0,1,3,2)]
-        
-        arm_start_z = self.axle_r*math.cos(self.print_angle)+self.axle_x-self.half_arm_width-(self.axle_r-self.axle_min_r)
-        arm_start_y = self.axle_r*math.sin(self.print_angle)
-        
-        verts += [(-x,-arm_start_y,-arm_start_z),(x,-arm_start_y,-arm_start_z)]
-        faces += [(4,5,1,0)]
-        
-        d = self.arm_length+arm_start_y
-        verts += [(-x,-arm_start_y+d,-arm_start_z-d),(x,-arm_start_y+d,-arm_start_z-d)]
-        faces += [(6,7,5,4),(2,3,7,6)]
-        
-        faces += [(0,2,6,4),(5,7,3,1)]
-        
-        return self.create_obj(verts,faces)
+    def apply_booleans(self,obj,steps,solver='MANIFOLD'):
+        # There doesn't appear to be a way to do boolean operations with bmesh.
+        # Every step becomes one modifier with all of its operands in a collection,
+        # and the whole stack is evaluated by the depsgraph in one go.
+        if self.profile is not None and len(steps) > 1:
+            # one step at a time, so every boolean is timed on its own
+            for step in steps:
+                self.apply_booleans(obj,[step],solver)
+            return
+        collections = []
+        operands = {"operations": [],"operands": 0,"operand_verts": 0,"operand_faces": 0}
+        for operation,meshes in steps:
+            collection = bpy.data.collections.new(f"{self.name}_{operation.lower()}")
+            bpy.context.scene.collection.children.link(collection)
+            collections.append(collection)
+            operands["operations"].append(operation)
+            for mesh in pack_disjoint(meshes):
+                self.create_obj(mesh,collection)
+                operands["operands"] += 1
+                operands["operand_verts"] += len(mesh.verts)
+                operands["operand_faces"] += len(mesh.totals)
+            bool = obj.modifiers.new(name=operation.lower(),type='BOOLEAN')
+            bool.operation = operation
+            bool.operand_type = 'COLLECTION'
+            bool.collection = collection
+            bool.solver = solver
 
-    def add_arm_space(self,depth=0):
-        verts = []
-        faces = []
-        
-        r = self.axle_major_r+self.clearance
-        y = -r*math.cos(self.down_angle-self.print_angle)
-        # note: the following may need to remove the last term if popping-out through the bottom occurs.
-        x = self.half_arm_width+self.clearance-y*math.sin(self.bendable_angle)
-        y = y*math.cos(self.bendable_angle)
-        z = r*math.sin(self.down_angle-self.print_angle)
-        verts += [(-x,y,z),(x,y,z)]
-        h = self.bottom+z
-        y = y-h*math.tan(self.down_angle-self.print_angle)
-        x = self.half_arm_width+self.clearance+abs(y*math.sin(self.bendable_angle))
-        verts += [(-x,y,-self.bottom),(x,y,-self.bottom)]
-        faces += [(2,3,1,0)]
-        
-        if y < 0:
-            x = self.half_arm_width+self.clearance
-            y = 0
-            z = -self.bottom
-            verts += [(-x,y,z),(x,y,z)]
-            faces += [(0,4,2),(1,3,5),(3,2,4,5)]
-        
-        x = self.half_arm_width+self.clearance
-        y = 0
-        z = self.axle_min_r
-        verts += [(-x,y,z),(x,y,z)]
-        l = len(verts)-1
-        faces += [(0,1,l,l-1),(0,l-1,l-3),(1,l-2,l)]
-        
-        if 0 == depth:
-            y = self.arm_length-self.clearance
-        else:
-            y = depth
-        x = y*math.tan(self.bendable_angle)+self.half_arm_width
-        x = max(x,self.half_arm_width+self.clearance)
-        z = -self.bottom
-        z_far_top = self.axle_min_r+y*math.tan(self.up_angle)
-        verts += [(-x,y,z_far_top),(x,y,z_far_top),(-x,y,z),(x,y,z)]
-        faces += [(l-1,l+1,l+3,l-3),(l-2,l+4,l+2,l),(l-3,l+3,l+4,l-2)]
-        
-        verts += [(0,0,self.axle_min_r+(self.clearance+self.half_arm_width)*math.tan(self.print_angle)),(0,y,z_far_top+x*math.tan(self.print_angle))]
-        faces += [(l-1,l,l+5),(l+1,l-1,l+5,l+6),(l,l+2,l+6,l+5),(l+1,l+6,l+2,l+4,l+3)]
-        
-        return self.create_obj(verts,faces)
-
-    def add_separator(self,tip_y,xz_radius,h_angle,up_angle,down_angle):
-        verts = []
-        faces = []
-
-        # create the end of the cylinder
-        verts += [(-xz_radius*math.cos(i*self.a_step),4*xz_radius,xz_radius*math.sin(i*self.a_step)) for i in range(self.resolution)]
-        faces += [(tuple(range(self.resolution)))]
-
-        final_up_r = tip_y*math.sin(up_angle)
-        final_up_y = tip_y*math.cos(up_angle)
-        final_h_r = tip_y*math.sin(h_angle)
-        final_h_y = tip_y*math.cos(h_angle)
-        final_down_r = tip_y*math.sin(down_angle)
-        final_down_y = tip_y*math.cos(down_angle)
-        
-        num_verts_above_below = math.floor((self.resolution-1)/2)
-        
-        # create the large side of the cone by finding the points
-        # that intersect a cylinder of radius xz_radius
-        l = len(verts)-1
-        pt_h_y = tip_y-(xz_radius-final_h_r)*math.tan(h_angle)
-        pt_up_y = tip_y*math.cos(up_angle)-(xz_radius-final_up_r)*math.tan(up_angle)
-        pt_down_y = tip_y*math.cos(down_angle)-(xz_radius-final_down_r)*math.tan(down_angle)
-        
-        for i in range(num_verts_above_below+1):
-            a = i*self.a_step
-            x = xz_radius*math.cos(a)
-            z = xz_radius*math.sin(a)
-            y_v = math.sqrt(math.pow(tip_y,2)-math.pow(z,2)) if z < final_up_r else final_up_y-(z-final_up_r)*math.tan(up_angle)
-            y_h = math.sqrt(math.pow(tip_y,2)-math.pow(x,2)) if abs(x) < final_h_r else final_h_y-(abs(x)-final_h_r)*math.tan(h_angle)
-            y = tip_y-(tip_y-y_h)*abs(math.cos(a))-(tip_y-y_v)*math.sin(a)
-            verts += [(-x,y,z)]
-        for i in range(num_verts_above_below+1):
-            a = i*self.a_step
-            x = xz_radius*math.cos(a)
-            z = xz_radius*math.sin(a)
-            y_v = math.sqrt(math.pow(tip_y,2)-math.pow(z,2)) if z < final_down_r else final_down_y-(z-final_down_r)*math.tan(down_angle)
-            y_h = math.sqrt(math.pow(tip_y,2)-math.pow(x,2)) if abs(x) < final_h_r else final_h_y-(abs(x)-final_h_r)*math.tan(h_angle)
-            y = tip_y-(tip_y-y_h)*abs(math.cos(a))-(tip_y-y_v)*math.sin(a)
-            verts += [(x,y,-z)]
-        
-        self.bridge_last_loop(verts,faces)
-
-        # create the small side of the cone by finding the points
-        # that intersect a sphere of radius tip_y
-        a_h_max = max(math.asin(final_h_r/tip_y),0.001)
-        a_h_step = 4*a_h_max/self.resolution
-        a_up_max = math.asin(final_up_r/tip_y)
-        for i in range(num_verts_above_below+1):
-            a = -a_h_max+i*a_h_step
-            b = a_up_max*math.cos(a/a_h_max*math.pi/2)
-            verts += [(tip_y*math.cos(b)*math.sin(a),tip_y*math.cos(b)*math.cos(a),tip_y*math.sin(b))]
-
-        a_down_max = math.asin(final_down_r/tip_y)
-        for i in range(num_verts_above_below+1):
-            a = -a_h_max+i*a_h_step
-            b = a_down_max*math.cos(a/a_h_max*math.pi/2)
-            verts += [(-tip_y*math.cos(b)*math.sin(a),tip_y*math.cos(b)*math.cos(a),-tip_y*math.sin(b))]
-        
-        self.bridge_last_loop(verts,faces)
-
-        # create the spherical part
-        max_angle = max(a_h_max,a_up_max,a_down_max)
-        num_rings = math.floor(max_angle/self.a_step)
-        if num_rings > 0:
-            a_h_step = a_h_max/num_rings
-            a_up_step = a_up_max/num_rings
-            a_down_step = a_down_max/num_rings
-            
-            for i in range(num_rings-1,0,-1):
-                ah = i*a_h_step
-                au = i*a_up_step
-                ad = i*a_down_step
-                for j in range(num_verts_above_below+1):
-                    a = -ah+j*4*ah/self.resolution
-                    b = au*math.cos(a/ah*math.pi/2)
-                    verts += [(tip_y*math.cos(b)*math.sin(a),tip_y*math.cos(b)*math.cos(a),tip_y*math.sin(b))]
-                for j in range(num_verts_above_below+1):
-                    a = -ah+j*4*ah/self.resolution
-                    b = ad*math.cos(a/ah*math.pi/2)
-                    verts += [(-tip_y*math.cos(b)*math.sin(a),tip_y*math.cos(b)*math.cos(a),-tip_y*math.sin(b))]
-                self.bridge_last_loop(verts,faces)
-        
-        # create the tip
-        verts += [(0,tip_y,0)]
-        l = len(verts)-1
-        faces += [(l,l-i,l-i-1) for i in range(1,self.resolution)]
-        faces += [(l,l-self.resolution,l-1)]
+        with self.timed("boolean",**operands):
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            mesh_data = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph),depsgraph=depsgraph)
+        mesh_data.name = f"{self.name}_data"
+        obj.modifiers.clear()
+        old_data = obj.data
+        obj.data = mesh_data
+        bpy.data.meshes.remove(old_data)
 
-        return self.create_obj(verts,faces)
+        for collection in collections:
+            for operand in collection.objects[:]:
+                operand_data = operand.data
+                bpy.data.objects.remove(operand)
+                bpy.data.meshes.remove(operand_data)
+            bpy.data.collections.remove(collection)
 
-    
-    def apply_boolean(self,objA,objB,type,solver='MANIFOLD'):
-        # There doesn't appear to be a way to do boolean operations with bmesh
-        bpy.context.view_layer.objects.active = objA
-        bool = objA.modifiers.new(name='bool',type='BOOLEAN')
-        bool.object = objB
-        bool.operation = type
-        bool.solver = solver
-        bpy.ops.object.modifier_apply(modifier=bool.name)
-        bpy.data.objects.remove(objB)
-    
-    def add_floor(self):
-        verts = []
-        faces = []
-        
-        x = self.separator_outer_r
-        y = 4*self.separator_y+self.clearance
-        z1 = -self.raise_z-1
-        z2 = -self.separator_outer_r-self.clearance
-        
-        verts += [(x,y,z1),(-x,y,z1),(-x,-y,z1),(x,-y,z1)]
-        faces += [(0,1,2,3)]
-        verts += [(x,y,z2),(-x,y,z2),(-x,-y,z2),(x,-y,z2)]
-        faces += [(7,6,5,4)]
-        faces += [(1,0,4,5),(2,1,5,6),(3,2,6,7),(0,3,7,4)]
-        
-        return self.create_obj(verts,faces)
-    
-    def joint1side(self):
-        a = self.add_arm_space()
-        b = self.add_separator(self.separator_y,self.separator_outer_r,self.print_angle,self.print_angle,self.print_angle)
-        self.apply_boolean(a,b,"UNION")
-        b = self.add_socket()
-        self.apply_boolean(a,b,"UNION")
-        a_h = self.print_angle-self.bendable_angle
-        if a_h <= 0:
-            a_h = math.radians(1)
-        a_u = self.print_angle-self.up_angle
-        if a_u <= 0:
-            a_u = math.radians(1)
-        a_d = self.print_angle-self.down_angle
-        if a_d <= 0:
-            a_d = math.radians(1)
-        b = self.add_separator(self.separator_y+self.clearance,2*self.separator_outer_r,a_h,a_u,a_d)
-        self.apply_boolean(a,b,"DIFFERENCE")
-
-        b = self.add_floor()
-        self.apply_boolean(a,b,"DIFFERENCE")
-        
-        b = self.add_arm()
-        self.apply_boolean(a,b,"DIFFERENCE")
-        b = self.add_axle()
-        self.apply_boolean(a,b,"DIFFERENCE")
-        
-        a.location.z += self.raise_z
-        
-        # clean up the boolean operation
-        bpy.context.view_layer.objects.active=a
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.dissolve_degenerate(threshold=0.001)
-        bpy.ops.object.editmode_toggle()
-        return a
-    
-    def joint2side(self):
-        a_min = min(self.bendable_angle,self.up_angle,self.down_angle)
-        
-        y = self.separator_y+self.clearance/2
-        y_offset = Vector((0,y,0))
-
-        rot180 = Vector((0,0,math.pi))
-        a = self.add_separator(self.separator_y,self.separator_outer_r,self.bendable_angle,self.up_angle,self.down_angle)
-        a.location -= y_offset
-        # the following adds self.clearance to have a cleaner boolean operation
-        b = self.add_separator(self.separator_y,self.separator_outer_r+self.clearance,self.bendable_angle,self.up_angle,self.down_angle)
-        b.rotation_euler = rot180
-        b.location += y_offset
-        self.apply_boolean(a,b,"INTERSECT")
-        
-        b = self.add_arm_space(y+self.clearance/100)
-        b.location -= y_offset
-        self.apply_boolean(a,b,"UNION")
-        b = self.add_arm_space(y+self.clearance/100)
-        b.rotation_euler = rot180
-        b.location += y_offset
-        self.apply_boolean(a,b,"UNION")
-        
-        b = self.add_socket()
-        b.location -= y_offset
-        self.apply_boolean(a,b,"UNION")
-        b = self.add_socket()
-        b.location += y_offset
-        self.apply_boolean(a,b,"UNION")
-        
-        b = self.add_floor()
-        self.apply_boolean(a,b,"DIFFERENCE")
-        
-        b = self.add_arm()
-        b.location -= y_offset
-        self.apply_boolean(a,b,"DIFFERENCE")
-        b = self.add_arm()
-        b.rotation_euler = rot180
-        b.location += y_offset
-        self.apply_boolean(a,b,"DIFFERENCE")
-        
-        b = self.add_axle()
-        b.location -= y_offset
-        self.apply_boolean(a,b,"DIFFERENCE")
-        b = self.add_axle()
-        b.location += y_offset
-        self.apply_boolean(a,b,"DIFFERENCE")
+    def cleanup(self,obj):
+        # clean up the boolean operation without going through edit mode,
+        # returns how much geometry was removed
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        verts = len(bm.verts)
+        faces = len(bm.faces)
+        bmesh.ops.dissolve_degenerate(bm,dist=self.degenerate_threshold,edges=bm.edges[:])
+        bmesh.ops.remove_doubles(bm,verts=bm.verts[:],dist=self.merge_distance)
+        bmesh.ops.recalc_face_normals(bm,faces=bm.faces[:])
+        self.cleanup_stats = {
+            "verts_removed": verts-len(bm.verts),
+            "faces_removed": faces-len(bm.faces)
+        }
+        bm.to_mesh(obj.data)
+        obj.data.update()
+        bm.free()
+        return self.cleanup_stats
+
+    def timed(self,stage,**info):
+        return self.profile.stage(stage,**info) if self.profile is not None else contextlib.nullcontext()
+
+    def generate(self,plan=None):
+        # build the joint from its plan, which may have been made in advance,
+        # profiled if that is turned on
+        if not profiling_enabled():
+            return self.build(*(plan or self.plan()))
+        self.profile = profiling.Profile(self.params())
+        stages = [name for name in dir(JointGeometry) if name.endswith("_mesh")]
+        stages += ["create_obj","cleanup","reduce"]
+        profiling.instrument(self,stages,self.profile)
+        try:
+            if plan is None:
+                with self.timed("plan"):
+                    plan = self.plan()
+            obj = self.build(*plan)
+        finally:
+            # later calls on this joint go to the methods again, not to the finished profile
+            for name in stages:
+                delattr(self,name)
+            profile,self.profile = self.profile,None
+        profiling.finish(profile)
+        return obj
+
+    def decimated(self,obj,ratio):
+        # a new mesh of obj with a collapse decimation, which keeps curved areas denser
+        decimate = obj.modifiers.new(name="reduce",type='DECIMATE')
+        decimate.decimate_type = 'COLLAPSE'
+        decimate.ratio = ratio
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        mesh_data = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph),depsgraph=depsgraph)
+        obj.modifiers.remove(decimate)
+        return mesh_data
+
+    def deviates(self,mesh_data,original,original_verts,max_deviation):
+        # whether mesh_data is not manifold or any of its vertices and triangle centers is
+        # further than max_deviation from the original surface, or the other way around;
+        # the median center of a concave face can lie far off the surface
+        bm = bmesh.new()
+        bm.from_mesh(mesh_data)
+        try:
+            if not bm.faces or not all(edge.is_manifold for edge in bm.edges):
+                return True
+            reduced = BVHTree.FromBMesh(bm)
+            points = [vert.co for vert in bm.verts]+[(a.vert.co+b.vert.co+c.vert.co)/3 for a,b,c in bm.calc_loop_triangles()]
+            return (any(original.find_nearest(point,max_deviation)[0] is None for point in points) or
+                    any(reduced.find_nearest(point,max_deviation)[0] is None for point in original_verts))
+        finally:
+            bm.free()
+
+    def reduce(self,obj):
+        # Fewer faces for a lighter cutter: the strongest decimation that stays within
+        # the maximum deviation and manifold, found by bisection, then coplanar faces
+        # are merged. Returns the face counts before and after.
+        max_deviation = self.reduction*self.clearance
+        faces = len(obj.data.polygons)
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        original = BVHTree.FromBMesh(bm)
+        original_verts = [vert.co.copy() for vert in bm.verts]
+        bm.free()
+
+        # every ratio decimates the original mesh, which stays on obj until the end
+        lo,hi = 0.0,1.0
+        best = None
+        for i in range(self.reduce_steps):
+            ratio = (lo+hi)/2
+            mesh_data = self.decimated(obj,ratio)
+            if self.deviates(mesh_data,original,original_verts,max_deviation):
+                lo = ratio
+                bpy.data.meshes.remove(mesh_data)
+            else:
+                hi = ratio
+                if best is not None:
+                    bpy.data.meshes.remove(best)
+                best = mesh_data
+        if best is not None:
+            old_data = obj.data
+            obj.data = best
+            bpy.data.meshes.remove(old_data)
+        obj.data.name = f"{self.name}_data"
+
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        bmesh.ops.dissolve_limit(bm,angle_limit=self.planar_angle,verts=bm.verts[:],edges=bm.edges[:])
+        if all(edge.is_manifold for edge in bm.edges):
+            bm.to_mesh(obj.data)
+            obj.data.update()
+        bm.free()
+        self.reduce_stats = {"faces_before": faces,"faces_after": len(obj.data.polygons)}
+        cache.remember_reduction(self.cache_key(),faces)
+        return self.reduce_stats
 
+    def build(self,base,steps):
+        a = self.create_obj(base)
+        self.apply_booleans(a,steps)
         a.location.z += self.raise_z
-        
-        # clean up the boolean operation
-        bpy.context.view_layer.objects.active=a
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.ops.mesh.dissolve_degenerate(threshold=0.001)
-        bpy.ops.object.editmode_toggle()
+        self.cleanup(a)
+        if self.reduction:
+            self.reduce(a)
         return a
     
     def joint(self):
         # make sure nothing is selected
         for obj in bpy.context.selected_objects[:]:
             obj.select_set(False)
-        ret = self.joint1side() if self.type == "1SIDE" else self.joint2side()
+        ret = self.generate()
         ret.select_set(True)
         bpy.context.view_layer.objects.active = ret
         return ret
+
+    def place(self,mesh):
+        # a new joint object using an existing mesh
+        for obj in bpy.context.selected_objects[:]:
+            obj.select_set(False)
+        ret = bpy.data.objects.new(self.name,mesh)
+        bpy.context.scene.collection.objects.link(ret)
+        ret.location.z += self.raise_z
+        ret.select_set(True)
+        bpy.context.view_layer.objects.active = ret
+        return ret
+
+    def mesh_from_data(self,data):
+        mesh = bpy.data.meshes.new(f"{self.name}_data")
+        self.corrected += fill_mesh(mesh,data)
+        return mesh
+
+    def joint_mesh(self,plan=None,store=True):
+        # the finished mesh without an object, shared with identical joints through the cache.
+        # With store off a generated joint isn't added to the joint library, e.g. while
+        # its parameters are dragged in the redo panel.
+        key = self.cache_key()
+        mesh = cache.lookup(key)
+        if mesh is None:
+            data = cache.snapshot(key)
+            directory = library_directory() if not self.preview else None
+            if data is None and directory:
+                data = library.load(directory,key)
+                faces = library.faces_before(directory,key)
+                if faces is not None:
+                    cache.remember_reduction(key,faces)
+            if data is None:
+                obj = self.generate(plan)
+                mesh = obj.data
+                data = mesh_to_data(mesh)
+                cache.store(key,mesh,data)
+                bpy.data.objects.remove(obj)
+                if directory and store:
+                    library.store(directory,key,data,library_size(),cache.faces_before(key))
+            else:
+                # the mesh is gone, e.g. undone, or was generated in an earlier session,
+                # but its arrays are still known
+                mesh = self.mesh_from_data(data)
+                cache.store(key,mesh,data)
+        return mesh
+
+    def cached_joint(self,link=True,store=True):
+        # reuse the mesh of an identical joint if there is one, otherwise generate and remember it
+        mesh = self.joint_mesh(store=store)
+        return self.place(mesh if link else mesh.copy())
+
+    def redo_joint(self):
+        # The operator runs again after every change in the redo panel, with its previous
+        # result undone. When only the placement changed, the previous mesh is rebuilt
+        # from its arrays instead of being generated again. The operator forgets it when
+        # invoked, so a new joint with the same parameters is generated again.
+        key = self.cache_key()
+        data = cache.last(key)
+        if data is None:
+            ret = self.joint()
+            cache.remember(key,mesh_to_data(ret.data))
+            return ret
+        return self.place(self.mesh_from_data(data))
+
+    def node_joint(self):
+        # a live joint evaluated by the shared Geometry Nodes group, which raises it by itself
+        ret = self.place(bpy.data.meshes.new(f"{self.name}_data"))
+        ret.location.z -= self.raise_z
+        modifier = ret.modifiers.new(self.name,'NODES')
+        modifier.node_group = nodes.joint_group(self.type)
+        values = self.params()
+        values["socket_width"] = self.size
+        nodes.set_inputs(modifier,values)
+        return ret
         
 
-class OBJECT_OT_fdmjoint(Operator):
-    """Create a new Joint"""
-    bl_idname = "mesh.fdmjoint"
-    bl_label = "Add FDM Joint"
-    bl_options = {'REGISTER', 'UNDO'}
-    
+class JointProperties:
+    # the joint parameters shared by the operators that generate joints
+
     type: EnumProperty(
         name="Separation Type",
         description="The type of separation between joints",
@@ -515,20 +586,854 @@ class OBJECT_OT_fdmjoint(Operator):
         default=64
     )
     
+    tessellation: EnumProperty(
+        name="Tessellation",
+        description="How the number of segments of the curved parts is chosen",
+        items=[
+            ("RESOLUTION","Resolution","Use the resolution for every curved part",1),
+            ("TOLERANCE","Tolerance","Use as few segments as the chord tolerance allows for each curved part, up to the resolution",2)
+        ],
+        default="RESOLUTION"
+    )
+    
+    chord_tolerance: FloatProperty(
+        name="Chord Tolerance",
+        description="How far the facets of curved parts may deviate from the true surface, as a fraction of the nozzle width",
+        subtype="FACTOR",
+        min=0.01,
+        max=1,
+        default=0.05
+    )
+
+    reduce_faces: BoolProperty(
+        name="Reduce Faces",
+        description="Decimate the finished joint and merge coplanar faces, so it is a lighter cutter for the model",
+        default=False
+    )
+
+    max_deviation: FloatProperty(
+        name="Max Deviation",
+        description="How far the reduced joint may deviate from the full one, as a fraction of the clearance",
+        subtype="FACTOR",
+        min=0.01,
+        max=1,
+        default=0.25
+    )
+
+    joint_props = ("type","socket_width","up_angle","down_angle","horizontal_angle","clearance","resolution","tessellation","chord_tolerance",
+                   "reduce_faces","max_deviation")
+
+    def draw_joint(self, layout):
+        layout.use_property_split = True
+        for name in self.joint_props:
+            layout.prop(self,name)
+        self.draw_limits(layout)
+
+    def draw_limits(self, layout):
+        # what the parameters allow, from the solver so nothing has to be generated
+        solution = solve(self.socket_width,self.clearance,self.horizontal_angle)
+        col = layout.box().column(align=True)
+        if not solution["feasible"]:
+            col.label(text="Axle size is too small and/or Clearance is too large",icon='ERROR')
+        col.label(text=f"Socket width at least {min_size(self.clearance).item():.2f} mm at this clearance")
+        col.label(text=f"Clearance at most {max_clearance(self.socket_width).item():.2f} mm at this socket width")
+        if not solution["feasible"]:
+            return
+        horizontal = solution["bendable_angle"].item()
+        up,down = self.up_angle,self.down_angle
+        if self.type == "1SIDE":
+            # the separator leaves at least 1 degree of the print angle
+            up,down = (min(angle,PRINT_ANGLE-math.radians(1)) for angle in (up,down))
+        col.label(text=f"Effective angles: horizontal {math.degrees(horizontal):.1f}°, up {math.degrees(up):.1f}°, down {math.degrees(down):.1f}°")
+        if horizontal < self.horizontal_angle-1e-6:
+            col.label(text=f"The horizontal angle is limited to {math.degrees(solution['max_bendable_angle'].item()):.1f}° by the socket width and clearance",icon='INFO')
+
+    def tolerance(self):
+        return self.chord_tolerance*NOZZLE_WIDTH if self.tessellation == "TOLERANCE" else None
+
+    def reduction(self):
+        return self.max_deviation if self.reduce_faces else 0.0
+
+    def make_joint(self,preview=False):
+        if preview:
+            return HPaulsen_FDMJoint(self.type,self.socket_width,self.up_angle,self.down_angle,self.horizontal_angle,self.clearance,
+                                     min(self.resolution,PREVIEW_RESOLUTION),preview=True)
+        return HPaulsen_FDMJoint(self.type,self.socket_width,self.up_angle,self.down_angle,self.horizontal_angle,self.clearance,self.resolution,self.tolerance(),
+                                 reduction=self.reduction())
+
+    def copy_joint_props(self,other):
+        # set the joint parameters of self from another JointProperties
+        for name in self.joint_props:
+            setattr(self,name,getattr(other,name))
+
+class FDMJointSettings(JointProperties,PropertyGroup):
+    # the parameters of a joint object, so it can be regenerated
+
+    is_joint: BoolProperty(default=False)
+
+    preview: BoolProperty(
+        name="Preview",
+        description=f"The joint is generated at a resolution of {PREVIEW_RESOLUTION} until it is finalized",
+        default=False
+    )
+
+    geometry_hash: StringProperty(
+        description="The parameters the current geometry of the joint was generated with"
+    )
+
+    raise_z: FloatProperty(
+        description="How far the joint geometry was raised, the object origin moves by the difference on regeneration"
+    )
+
+    # the last range of motion check, valid while motion_hash matches geometry_hash
+    motion_hash: StringProperty()
+    motion_clearance: FloatProperty(unit='LENGTH')
+    motion_collisions: IntProperty()
+
+    def joint(self):
+        return self.make_joint(self.preview)
+
+def joint_hash(joint):
+    return hashlib.sha1(repr(joint.cache_key()).encode()).hexdigest()[:16]
+
+def store_settings(obj,props,joint,preview=False):
+    settings = obj.fdm_joint
+    settings.copy_joint_props(props)
+    settings.is_joint = True
+    settings.preview = preview
+    settings.geometry_hash = joint_hash(joint)
+    settings.raise_z = joint.raise_z
+
+def node_modifier(obj):
+    for modifier in obj.modifiers:
+        if modifier.type == 'NODES' and modifier.node_group is not None and nodes.TYPE_PROP in modifier.node_group:
+            return modifier
+    return None
+
+def stale_joints(objs,force=False):
+    # The joints whose parameters no longer match their geometry, grouped by
+    # geometry hash as hash -> (joint, objects), and (object, error) for joints
+    # that are not possible.
+    groups = {}
+    errors = []
+    for obj in objs:
+        settings = obj.fdm_joint
+        if not settings.is_joint:
+            continue
+        try:
+            joint = settings.joint()
+        except RuntimeError as err:
+            errors.append((obj,str(err)))
+            continue
+        key = joint_hash(joint)
+        if force or key != settings.geometry_hash:
+            groups.setdefault(key,(joint,[]))[1].append(obj)
+    return groups,errors
+
+def update_joints(key,joint,objs,plan=None):
+    # give the objects the geometry of joint, generated at most once
+    mesh = None
+    for obj in objs:
+        settings = obj.fdm_joint
+        modifier = node_modifier(obj)
+        if modifier is not None:
+            modifier.node_group = nodes.joint_group(joint.type)
+            values = joint.params()
+            values["socket_width"] = joint.size
+            nodes.set_inputs(modifier,values)
+        else:
+            mesh = mesh or joint.joint_mesh(plan)
+            old_data = obj.data
+            obj.data = mesh
+            if old_data.users == 0:
+                bpy.data.meshes.remove(old_data)
+            obj.matrix_world = obj.matrix_world@Matrix.Translation((0,0,joint.raise_z-settings.raise_z))
+            settings.raise_z = joint.raise_z
+        settings.geometry_hash = key
+
+def regenerate(objs,force=False):
+    # Rebuild the joints whose parameters no longer match their geometry, every
+    # distinct joint once. Returns the number of joints rebuilt, the distinct joints
+    # generated and (object, error) for joints that are not possible.
+    groups,errors = stale_joints(objs,force)
+    for key,(joint,joint_objs) in groups.items():
+        update_joints(key,joint,joint_objs)
+    return sum(len(joint_objs) for joint,joint_objs in groups.values()),[joint for joint,joint_objs in groups.values()],errors
+
+class OBJECT_OT_fdmjoint(JointProperties,Operator):
+    """Create a new Joint"""
+    bl_idname = "mesh.fdmjoint"
+    bl_label = "Add FDM Joint"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    mode: EnumProperty(
+        name="Mode",
+        description="How the joint geometry is generated",
+        items=[
+            ("MESH","Mesh","Generate the joint mesh once",1),
+            ("NODES","Geometry Nodes","Generate the joint with a Geometry Nodes modifier, its parameters stay editable in the modifier",2)
+        ],
+        default="MESH"
+    )
+
     location: FloatVectorProperty(name="Location",unit="LENGTH")
     
     rotation: FloatVectorProperty(name="Rotation",unit="ROTATION")
 
+    preview: BoolProperty(
+        name="Preview",
+        description=f"Quickly generate the joint at a resolution of {PREVIEW_RESOLUTION} while adjusting the parameters. "
+                    "Disable it or use Finalize FDM Joints to build the full quality joint",
+        default=False
+    )
+
+    use_cache: BoolProperty(
+        name="Reuse Identical Joints",
+        description="Reuse the geometry of a joint with identical parameters instead of generating it again",
+        default=True
+    )
+
+    link_mesh: BoolProperty(
+        name="Link Mesh Data",
+        description="Share the mesh data with identical joints instead of copying it",
+        default=True
+    )
+
+    def draw(self, context):
+        self.draw_joint(self.layout)
+        for name in ("mode","location","rotation","preview","use_cache","link_mesh"):
+            self.layout.prop(self,name)
+
+    def invoke(self, context, event):
+        # only redoing this run may reuse the previous joint, see redo_joint
+        cache.forget_last()
+        return self.add_joint(context,True)
+
     def execute(self, context):
+        # also every change in the redo panel, those joints don't go into the joint library
+        return self.add_joint(context,False)
+
+    def add_joint(self,context,store):
 
         try:
-            j = HPaulsen_FDMJoint(self.type,self.socket_width,self.up_angle,self.down_angle,self.horizontal_angle,self.clearance,self.resolution)
-            obj = j.joint()
+            j = self.make_joint()
+            if self.mode == "NODES":
+                obj = j.node_joint()
+                store_settings(obj,self,j)
+                obj.location = obj.location+Vector(self.location)
+                obj.rotation_euler = Vector(self.rotation)
+                return {'FINISHED'}
+            if self.preview:
+                j = self.make_joint(preview=True)
+            obj = j.cached_joint(self.link_mesh,store) if self.use_cache else j.redo_joint()
+            store_settings(obj,self,j,self.preview)
+            if self.preview:
+                obj.name = f"{j.name} (Preview)"
+            report_corrected(self,[j])
             obj.location = obj.location+Vector(self.location)
             obj.rotation_euler = Vector(self.rotation)
+            faces = cache.faces_before(j.cache_key())
+            if faces is not None:
+                self.report({'INFO'},f"Reduced the joint from {faces} to {len(obj.data.polygons)} faces")
+        except RuntimeError as err:
+            self.report({'ERROR'},str(err))
+
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_invalidate_cache(Operator):
+    """Forget all cached joint geometry and remove cached meshes that are no longer used"""
+    bl_idname = "mesh.fdmjoint_invalidate_cache"
+    bl_label = "Invalidate FDM Joint Cache"
+
+    def execute(self, context):
+        cache.invalidate()
+        clear_primitives()
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_finalize(Operator):
+    """Replace all preview joints in the scene with full quality joints, generating each distinct joint once"""
+    bl_idname = "mesh.fdmjoint_finalize"
+    bl_label = "Finalize FDM Joints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objs = [obj for obj in context.scene.objects if obj.fdm_joint.is_joint and obj.fdm_joint.preview]
+        if not objs:
+            self.report({'INFO'},"There are no preview joints to finalize")
+            return {'CANCELLED'}
+        for obj in objs:
+            obj.fdm_joint.preview = False
+        rebuilt,joints,errors = regenerate(objs)
+        for obj,error in errors:
+            obj.fdm_joint.preview = True
+            self.report({'ERROR'},f"{obj.name}: {error}")
+        for obj in objs:
+            if not obj.fdm_joint.preview:
+                obj.name = obj.name.replace(" (Preview)","")
+        report_corrected(self,joints)
+        self.report({'INFO'},f"Finalized {rebuilt} joints, {len(joints)} generated")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_batch(JointProperties,Operator):
+    """Add joints at the selected empties, the vertices of the active mesh or along the active curve, generating the joint once"""
+    bl_idname = "mesh.fdmjoint_batch"
+    bl_label = "Add FDM Joints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: EnumProperty(
+        name="Place At",
+        description="Where the joints are placed",
+        items=[
+            ("EMPTIES","Selected Empties","One joint at every selected empty",1),
+            ("VERTICES","Mesh Vertices","One joint at every vertex of the active mesh",2),
+            ("CURVE","Along Curve","Joints evenly spaced along the active curve",3)
+        ],
+        default="EMPTIES"
+    )
+
+    count: IntProperty(
+        name="Count",
+        description="The number of joints along the curve",
+        min=1,
+        default=10
+    )
+
+    align: EnumProperty(
+        name="Align",
+        description="How the joints are oriented",
+        items=[
+            ("NONE","None","Keep the joints unrotated",1),
+            ("TANGENT","Tangent","Turn the joints about Z so their arm follows the curve or the first edge of the vertex, they stay upright for printing",2),
+            ("NORMAL","Normal","Tilt the joints so their top follows the vertex normal, or stays perpendicular to the curve, with the arm along the tangent",3)
+        ],
+        default="TANGENT"
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def draw(self, context):
+        self.draw_joint(self.layout)
+        for name in ("source","count","align"):
+            self.layout.prop(self,name)
+
+    def placements(self, context):
+        obj = context.active_object
+        if self.source == "EMPTIES":
+            return empty_placements(context.selected_objects,self.align)
+        if self.source == "VERTICES":
+            return vertex_placements(obj,self.align) if obj is not None and obj.type == 'MESH' else []
+        if obj is None or obj.type != 'CURVE':
+            return []
+        return curve_placements(obj,self.count,self.align,context.evaluated_depsgraph_get())
+
+    def execute(self, context):
+        placements = self.placements(context)
+        if not placements:
+            self.report({'ERROR'},"FDMJoint: Nothing to place joints at")
+            return {'CANCELLED'}
+        try:
+            j = self.make_joint()
+            mesh = j.joint_mesh()
         except RuntimeError as err:
             self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        report_corrected(self,[j])
+
+        for obj in context.selected_objects[:]:
+            obj.select_set(False)
+        raise_z = Matrix.Translation((0,0,j.raise_z))
+        for placement in placements:
+            obj = bpy.data.objects.new(j.name,mesh)
+            context.scene.collection.objects.link(obj)
+            obj.matrix_world = placement@raise_z
+            store_settings(obj,self,j)
+            obj.select_set(True)
+        context.view_layer.objects.active = obj
+        self.report({'INFO'},f"Added {len(placements)} joints")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_cut(Operator):
+    """Subtract the selected joints from the active object with a single boolean. Apply also applies the model's enabled modifiers first, so mirrored or subdivided models are cut like with the Modifier mode"""
+    bl_idname = "mesh.fdmjoint_cut"
+    bl_label = "Cut FDM Joints into Model"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="Mode",
+        description="How the joints are cut into the model",
+        items=[
+            ("APPLY","Apply","Apply the enabled modifiers of the model and cut all joints into the result at once",1),
+            ("MODIFIER","Modifier","Add the joints to a collection used by one Boolean modifier on the model",2)
+        ],
+        default="APPLY"
+    )
+
+    hide_joints: BoolProperty(
+        name="Hide Joints",
+        description="Hide the joints after cutting them into the model",
+        default=True
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and context.active_object is not None and context.active_object.type == 'MESH'
+
+    def execute(self, context):
+        target = context.active_object
+        joints = [obj for obj in context.selected_objects if obj != target and obj.type == 'MESH']
+        if not joints:
+            self.report({'ERROR'},"FDMJoint: Select the joints and then the model to cut them into")
+            return {'CANCELLED'}
+        if self.mode == "APPLY":
+            corrected = cut_joints(target,joints)
+            if corrected:
+                self.report({'WARNING'},f"FDMJoint: {corrected} cutters had invalid geometry which was corrected")
+        else:
+            cutter_modifier(target,joints)
+        if self.hide_joints:
+            for joint in joints:
+                joint.hide_set(True)
+        self.report({'INFO'},f"Cut {len(joints)} joints into {target.name}")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_prewarm(JointProperties,Operator):
+    """Generate the joints of a parameter grid into the joint library, so they load instantly later"""
+    bl_idname = "mesh.fdmjoint_prewarm"
+    bl_label = "Pre-warm FDM Joint Library"
+
+    types: EnumProperty(
+        name="Separation Types",
+        items=[
+            ("1SIDE","1 Sided","",1),
+            ("2SIDE","2 Sided","",2)
+        ],
+        options={'ENUM_FLAG'},
+        default={"1SIDE","2SIDE"}
+    )
+
+    socket_widths: StringProperty(
+        name="Socket Widths",
+        description="Comma separated socket widths",
+        default="4,6,8,10"
+    )
+
+    clearances: StringProperty(
+        name="Clearances",
+        description="Comma separated clearances",
+        default="0.3"
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        for name in ("types","socket_widths","clearances","up_angle","down_angle","horizontal_angle","resolution","tessellation","chord_tolerance",
+                     "reduce_faces","max_deviation"):
+            self.layout.prop(self,name)
+
+    def execute(self, context):
+        directory = library_directory()
+        if directory is None:
+            self.report({'ERROR'},"FDMJoint: The joint library is turned off in the preferences")
+            return {'CANCELLED'}
+        try:
+            sizes = [float(value) for value in self.socket_widths.split(",")]
+            clearances = [float(value) for value in self.clearances.split(",")]
+        except ValueError:
+            self.report({'ERROR'},"FDMJoint: Socket widths and clearances must be comma separated numbers")
+            return {'CANCELLED'}
 
+        grid = [(type,size,clearance) for type in sorted(self.types) for size in sizes for clearance in clearances]
+        generated = present = impossible = 0
+        joints = [] # the generated ones
+        wm = context.window_manager
+        wm.progress_begin(0,len(grid))
+        for i,(type,size,clearance) in enumerate(grid):
+            wm.progress_update(i)
+            try:
+                j = HPaulsen_FDMJoint(type,size,self.up_angle,self.down_angle,self.horizontal_angle,clearance,self.resolution,self.tolerance(),
+                                      reduction=self.reduction())
+            except RuntimeError:
+                impossible += 1
+                continue
+            key = j.cache_key()
+            if library.contains(directory,key):
+                present += 1
+                continue
+            obj = j.generate()
+            mesh = obj.data
+            library.store(directory,key,mesh_to_data(mesh),library_size(),cache.faces_before(key))
+            bpy.data.objects.remove(obj)
+            bpy.data.meshes.remove(mesh)
+            generated += 1
+            joints.append(j)
+        wm.progress_end()
+        report_corrected(self,joints)
+        self.report({'INFO'},f"Generated {generated} joints, {present} were already in the library, {impossible} are not possible")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_clear_library(Operator):
+    """Remove all joints from the joint library"""
+    bl_idname = "mesh.fdmjoint_clear_library"
+    bl_label = "Clear FDM Joint Library"
+
+    def execute(self, context):
+        directory = library_directory()
+        if directory:
+            library.clear(directory)
+        return {'FINISHED'}
+
+class FDMJointPreferences(AddonPreferences):
+    bl_idname = __package__
+
+    use_library: BoolProperty(
+        name="Joint Library",
+        description="Keep generated joints on disk, so joints with the same parameters load instantly in later sessions",
+        default=True
+    )
+
+    library_path: StringProperty(
+        name="Library Directory",
+        description="Where the joint library is kept, the extension's user directory if empty",
+        subtype='DIR_PATH'
+    )
+
+    library_size: IntProperty(
+        name="Size Limit (MiB)",
+        description="The least recently used joints are removed when the library grows beyond this size",
+        min=1,
+        default=256
+    )
+
+    profiling: BoolProperty(
+        name="Profile Joint Generation",
+        description="Time every stage of joint generation, shown in the FDM Joints tab of the sidebar. "
+                    "The booleans are evaluated one at a time while this is on",
+        default=False
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self,"profiling")
+        layout.operator(OBJECT_OT_fdmjoint_invalidate_cache.bl_idname)
+        layout.prop(self,"use_library")
+        col = layout.column()
+        col.active = self.use_library
+        col.prop(self,"library_path")
+        col.prop(self,"library_size")
+        directory = library_directory()
+        if directory:
+            col.label(text=f"{library.size(directory)/1024/1024:.1f} MiB in {directory}")
+        row = col.row()
+        row.operator(OBJECT_OT_fdmjoint_prewarm.bl_idname)
+        row.operator(OBJECT_OT_fdmjoint_clear_library.bl_idname)
+
+class OBJECT_OT_fdmjoint_export_profile(Operator, ExportHelper):
+    """Save the timings of the last joint and of all joints generated in this session as JSON"""
+    bl_idname = "mesh.fdmjoint_export_profile"
+    bl_label = "Export Joint Profile"
+
+    filename_ext = ".json"
+    filter_glob: StringProperty(default="*.json",options={'HIDDEN'})
+
+    def execute(self, context):
+        profiling.export(self.filepath)
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_reset_profile(Operator):
+    """Forget the joint generation timings of this session"""
+    bl_idname = "mesh.fdmjoint_reset_profile"
+    bl_label = "Reset Joint Profile"
+
+    def execute(self, context):
+        profiling.reset()
+        return {'FINISHED'}
+
+class VIEW3D_PT_fdmjoint_profile(Panel):
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "FDM Joints"
+    bl_label = "Joint Profile"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        prefs = preferences()
+        if prefs is not None:
+            layout.prop(prefs,"profiling")
+        profile = profiling.last()
+        if profile is not None:
+            col = layout.box().column(align=True)
+            col.label(text=f"Last joint: {profile.total():.3f} s")
+            for stage in profile.stages:
+                text = f"{'    '*stage['depth']}{stage['stage']}: {1000*stage['time']:.1f} ms"
+                if "faces" in stage:
+                    text += f", {stage['faces']} faces"
+                if "operations" in stage:
+                    text += f", {' '.join(stage['operations']).lower()} of {stage['operands']} operands with {stage['operand_faces']} faces"
+                if "faces_removed" in stage:
+                    text += f", {stage['faces_removed']} faces removed"
+                col.label(text=text)
+        if profiling.joints():
+            col = layout.box().column(align=True)
+            col.label(text=f"Session: {profiling.joints()} joints")
+            for name,entry in profiling.aggregate().items():
+                col.label(text=f"{name}: {entry['count']}x, mean {1000*entry['mean']:.1f} ms, total {entry['total']:.2f} s")
+        row = layout.row()
+        row.operator(OBJECT_OT_fdmjoint_export_profile.bl_idname,text="Export")
+        row.operator(OBJECT_OT_fdmjoint_reset_profile.bl_idname,text="Reset")
+
+class OBJECT_OT_fdmjoint_regenerate(Operator):
+    """Rebuild the joints whose parameters changed since they were generated, generating each distinct joint once"""
+    bl_idname = "mesh.fdmjoint_regenerate"
+    bl_label = "Regenerate FDM Joints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    selected_only: BoolProperty(
+        name="Selected Only",
+        description="Only regenerate the selected joints instead of all joints in the scene",
+        default=False
+    )
+
+    force: BoolProperty(
+        name="Force",
+        description="Also rebuild joints whose parameters didn't change",
+        default=False
+    )
+
+    def execute(self, context):
+        objs = context.selected_objects if self.selected_only else context.scene.objects
+        rebuilt,joints,errors = regenerate(objs,self.force)
+        for obj,error in errors:
+            self.report({'ERROR'},f"{obj.name}: {error}")
+        report_corrected(self,joints)
+        self.report({'INFO'},f"Regenerated {rebuilt} joints, {len(joints)} generated")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_edit(JointProperties,Operator):
+    """Change the parameters of all selected joints and regenerate them. Only the parameters changed here are set, the others keep their value on every joint"""
+    bl_idname = "mesh.fdmjoint_edit"
+    bl_label = "Edit FDM Joints"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    original: StringProperty(options={'HIDDEN','SKIP_SAVE'}) # the parameters of the active joint as JSON
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.fdm_joint.is_joint for obj in context.selected_objects)
+
+    def invoke(self, context, event):
+        obj = context.active_object
+        if obj is None or not obj.fdm_joint.is_joint:
+            obj = next(obj for obj in context.selected_objects if obj.fdm_joint.is_joint)
+        self.copy_joint_props(obj.fdm_joint)
+        self.original = json.dumps({name: getattr(self,name) for name in self.joint_props})
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        self.draw_joint(self.layout)
+
+    def execute(self, context):
+        original = json.loads(self.original) if self.original else {}
+        changed = [name for name in self.joint_props if original.get(name) != getattr(self,name)]
+        objs = [obj for obj in context.selected_objects if obj.fdm_joint.is_joint]
+        for obj in objs:
+            for name in changed:
+                setattr(obj.fdm_joint,name,getattr(self,name))
+        rebuilt,joints,errors = regenerate(objs)
+        for obj,error in errors:
+            self.report({'ERROR'},f"{obj.name}: {error}")
+        report_corrected(self,joints)
+        self.report({'INFO'},f"Changed {len(changed)} parameters of {len(objs)} joints, {len(joints)} generated")
+        return {'FINISHED'}
+
+class VIEW3D_PT_fdmjoint(Panel):
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "FDM Joints"
+    bl_label = "Joint"
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.fdm_joint.is_joint
+
+    def draw(self, context):
+        settings = context.active_object.fdm_joint
+        settings.draw_joint(self.layout)
+        self.layout.prop(settings,"preview")
+        try:
+            changed = joint_hash(settings.joint()) != settings.geometry_hash
+        except RuntimeError:
+            changed = False
+        col = self.layout.column(align=True)
+        if changed:
+            col.label(text="The parameters changed since the joint was generated",icon='INFO')
+        col.operator(OBJECT_OT_fdmjoint_regenerate.bl_idname,text="Regenerate Selected").selected_only = True
+        col.operator(OBJECT_OT_fdmjoint_regenerate.bl_idname,text="Regenerate All").selected_only = False
+        col.operator(OBJECT_OT_fdmjoint_regenerate_background.bl_idname,text="Regenerate All in Background").selected_only = False
+        col.operator(OBJECT_OT_fdmjoint_edit.bl_idname)
+        col = self.layout.column(align=True)
+        if settings.motion_hash and settings.motion_hash == settings.geometry_hash:
+            if settings.motion_collisions:
+                col.label(text=f"Collides in {settings.motion_collisions} poses",icon='ERROR')
+            elif settings.motion_clearance:
+                col.label(text=f"Smallest clearance {settings.motion_clearance:.3f} mm")
+            else:
+                col.label(text="No collisions")
+        col.operator(OBJECT_OT_fdmjoint_check_motion.bl_idname)
+
+MOTION_TEXT = "FDMJoint Motion"
+
+class OBJECT_OT_fdmjoint_check_motion(Operator):
+    """Turn the active joint through its range of motion and report the smallest clearance between its sides and any poses where they collide"""
+    bl_idname = "mesh.fdmjoint_check_motion"
+    bl_label = "Check FDM Joint Motion"
+    bl_options = {'REGISTER'}
+
+    step: FloatProperty(
+        name="Step",
+        description="Angle between the checked poses",
+        subtype='ANGLE',
+        default=math.radians(2.5),
+        min=math.radians(0.25),
+        max=math.radians(15)
+    )
+
+    full_grid: BoolProperty(
+        name="All Combinations",
+        description="Check every combination of vertical and horizontal angle, instead of each direction on its own and the four extremes",
+        default=False
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.fdm_joint.is_joint
+
+    def execute(self, context):
+        obj = context.active_object
+        settings = obj.fdm_joint
+        try:
+            joint = settings.joint()
+            if joint_hash(joint) != settings.geometry_hash:
+                self.report({'ERROR'},"FDMJoint: The parameters changed since the joint was generated, regenerate it first")
+                return {'CANCELLED'}
+            # the mesh the object shows, a Geometry Nodes joint is raised by its node group
+            obj_eval = obj.evaluated_get(context.evaluated_depsgraph_get())
+            data = mesh_to_data(obj_eval.to_mesh())
+            obj_eval.to_mesh_clear()
+            if node_modifier(obj) is not None:
+                data = data.transformed(offset=(0,0,-joint.raise_z))
+            result = motion.sweep(joint,data,self.step,full_grid=self.full_grid)
+        except RuntimeError as err:
+            self.report({'ERROR'},str(err))
+            return {'CANCELLED'}
+        settings.motion_hash = joint_hash(joint)
+        settings.motion_clearance = result["min_clearance"] if result["min_pose"] else 0
+        settings.motion_collisions = len(result["collisions"])
+        text = f"{result['poses']} poses in {result['time']:.2f} s"
+        if result["collisions"]:
+            # every colliding pose goes to a text datablock, the report names the worst
+            lines = bpy.data.texts.get(MOTION_TEXT) or bpy.data.texts.new(MOTION_TEXT)
+            lines.clear()
+            lines.write(f"{obj.name}: collides in {len(result['collisions'])} of {text}\n")
+            for collision in result["collisions"]:
+                lines.write(f"up {math.degrees(collision['pitch']):.1f}°, left {math.degrees(collision['yaw']):.1f}°, "
+                            f"{collision['points']} points\n")
+            worst = max(result["collisions"],key=lambda collision: collision["points"])
+            self.report({'WARNING'},f"Collides in {len(result['collisions'])} of {text}, most at up "
+                        f"{math.degrees(worst['pitch']):.1f}°, left {math.degrees(worst['yaw']):.1f}°, see the text {MOTION_TEXT}")
+        elif result["min_pose"]:
+            pitch,yaw = (math.degrees(angle) for angle in result["min_pose"])
+            self.report({'INFO'},f"Smallest clearance {result['min_clearance']:.3f} mm at up {pitch:.1f}°, left {yaw:.1f}°, {text}")
+        else:
+            self.report({'INFO'},f"No collisions, {text}")
+        return {'FINISHED'}
+
+class OBJECT_OT_fdmjoint_regenerate_background(Operator):
+    """Regenerate the joints whose parameters changed while Blender stays responsive. The geometry is planned on worker threads, the booleans run one joint at a time"""
+    bl_idname = "mesh.fdmjoint_regenerate_background"
+    bl_label = "Regenerate FDM Joints in Background"
+    bl_options = {'UNDO'} # no redo, that would run the modal operator again
+
+    selected_only: BoolProperty(
+        name="Selected Only",
+        description="Only regenerate the selected joints instead of all joints in the scene",
+        default=False
+    )
+
+    force: BoolProperty(
+        name="Force",
+        description="Also rebuild joints whose parameters didn't change",
+        default=False
+    )
+
+    interval = 0.05 # seconds between timer events
+
+    def execute(self, context):
+        objs = context.selected_objects if self.selected_only else context.scene.objects
+        groups,errors = stale_joints(objs,self.force)
+        for obj,error in errors:
+            self.report({'ERROR'},f"{obj.name}: {error}")
+        if not groups:
+            self.report({'INFO'},"All joints are up to date")
+            return {'CANCELLED'}
+
+        # object names, the objects themselves may be removed while this runs
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1,(os.cpu_count() or 2)-1))
+        self.jobs = [(key,joint,[obj.name for obj in joint_objs],self.executor.submit(joint.plan))
+                     for key,(joint,joint_objs) in groups.items()]
+        self.joints = [joint for key,joint,names,future in self.jobs]
+        self.total = len(self.jobs)
+        self.rebuilt = 0
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(self.interval,window=context.window)
+        wm.progress_begin(0,self.total)
+        wm.modal_handler_add(self)
+        self.status(context)
+        return {'RUNNING_MODAL'}
+
+    def status(self, context):
+        context.workspace.status_text_set(f"Regenerating FDM joints: {self.total-len(self.jobs)} of {self.total} done, Esc to cancel")
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            return self.finish(context,cancelled=True)
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        # one joint per timer event, so the interface is redrawn in between
+        for job in self.jobs:
+            key,joint,names,future = job
+            if not future.done():
+                continue
+            self.jobs.remove(job)
+            objs = [bpy.data.objects[name] for name in names if name in bpy.data.objects]
+            try:
+                update_joints(key,joint,objs,future.result())
+                self.rebuilt += len(objs)
+            except Exception as err:
+                # anything raised on a worker thread ends up here, the remaining joints go on
+                self.report({'ERROR'},f"FDMJoint: {err}")
+            context.window_manager.progress_update(self.total-len(self.jobs))
+            self.status(context)
+            break
+        if not self.jobs:
+            return self.finish(context)
+        return {'PASS_THROUGH'}
+
+    def finish(self, context, cancelled=False):
+        self.executor.shutdown(wait=False,cancel_futures=True)
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        generated = self.total-len(self.jobs)
+        report_corrected(self,self.joints)
+        self.report({'WARNING'} if cancelled else {'INFO'},
+                    f"Regenerated {self.rebuilt} joints, {generated} generated" + (f", {len(self.jobs)} cancelled" if cancelled else ""))
+        # the joints that were done stay done, also when cancelled
         return {'FINISHED'}
 
 # Registration
@@ -539,6 +1444,16 @@ def fdmjoint_button(self, context):
         text="FDM Joint",
         icon='PLUGIN')
 
+def fdmjoint_object_menu(self, context):
+    self.layout.separator()
+    self.layout.operator(OBJECT_OT_fdmjoint_batch.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_finalize.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_regenerate.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_regenerate_background.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_edit.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_check_motion.bl_idname)
+    self.layout.operator(OBJECT_OT_fdmjoint_cut.bl_idname)
+
 # This allows you to right click on a button and link to documentation
 def fdmjoint_manual_map():
     url_manual_prefix = "https://github.com/hpaulsen/fdm_joints/"
@@ -548,12 +1463,49 @@ def fdmjoint_manual_map():
     return url_manual_prefix, url_manual_mapping
 
 def register():
+    bpy.utils.register_class(FDMJointSettings)
+    bpy.types.Object.fdm_joint = PointerProperty(type=FDMJointSettings)
     bpy.utils.register_class(OBJECT_OT_fdmjoint)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_invalidate_cache)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_finalize)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_batch)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_cut)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_prewarm)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_clear_library)
+    bpy.utils.register_class(FDMJointPreferences)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_export_profile)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_reset_profile)
+    bpy.utils.register_class(VIEW3D_PT_fdmjoint_profile)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_regenerate)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_edit)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_regenerate_background)
+    bpy.utils.register_class(OBJECT_OT_fdmjoint_check_motion)
+    bpy.utils.register_class(VIEW3D_PT_fdmjoint)
     bpy.utils.register_manual_map(fdmjoint_manual_map)
     bpy.types.VIEW3D_MT_mesh_add.append(fdmjoint_button)
+    bpy.types.VIEW3D_MT_object.append(fdmjoint_object_menu)
 
 def unregister():
+    cache.invalidate()
+    bpy.types.VIEW3D_MT_object.remove(fdmjoint_object_menu)
+    bpy.utils.unregister_class(VIEW3D_PT_fdmjoint)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_check_motion)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_regenerate_background)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_edit)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_regenerate)
+    bpy.utils.unregister_class(VIEW3D_PT_fdmjoint_profile)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_reset_profile)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_export_profile)
+    bpy.utils.unregister_class(FDMJointPreferences)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_clear_library)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_prewarm)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_cut)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_batch)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_finalize)
+    bpy.utils.unregister_class(OBJECT_OT_fdmjoint_invalidate_cache)
     bpy.utils.unregister_class(OBJECT_OT_fdmjoint)
+    del bpy.types.Object.fdm_joint
+    bpy.utils.unregister_class(FDMJointSettings)
     bpy.utils.unregister_manual_map(fdmjoint_manual_map)
     bpy.types.VIEW3D_MT_mesh_add.remove(fdmjoint_button)
 
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import importlib.util
+
+# Benchmark of the whole joint generation, runs in Blender:
+#   blender -b --factory-startup --python-exit-code 1 --python benchmarks/bench_blender.py -- --output blender.json
+# Exits with 1 if a possible parameter set failed or gave an invalid mesh.
+
+import bpy
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+import sweep
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location("fdm_joints",os.path.join(sweep.ADDON_DIR,"__init__.py"),
+                                                  submodule_search_locations=[sweep.ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["fdm_joints"] = module
+    spec.loader.exec_module(module)
+    return module
+
+fdm_joints = load_addon()
+geometry = sys.modules["fdm_joints.geometry"]
+motion = sys.modules["fdm_joints.motion"]
+MESH_METHODS = [name for name in dir(geometry.JointGeometry) if name.endswith("_mesh")]
+
+def clear_scene():
+    for obj in bpy.data.objects[:]:
+        bpy.data.objects.remove(obj)
+    for mesh in bpy.data.meshes[:]:
+        bpy.data.meshes.remove(mesh)
+
+def run(params):
+    result = dict(params)
+    geometry.clear_primitives() # time the generation, not the memo
+    try:
+        joint = fdm_joints.HPaulsen_FDMJoint(**params)
+    except RuntimeError as err:
+        result["error"] = str(err)
+        result["feasible"] = False # not a failure, these parameters aren't possible
+        return result
+    stages = {}
+    sweep.timed_methods(joint,stages,MESH_METHODS+["create_obj"])
+    try:
+        # the same stages as HPaulsen_FDMJoint.build, with every boolean step evaluated on its own
+        start = time.perf_counter()
+        base,steps = joint.plan()
+        stages["plan"] = time.perf_counter()-start
+        obj = joint.create_obj(base)
+        for i,step in enumerate(steps):
+            create_time = stages["create_obj"]
+            start = time.perf_counter()
+            joint.apply_booleans(obj,[step])
+            stages[f"boolean_{i}_{step[0].lower()}"] = time.perf_counter()-start-(stages["create_obj"]-create_time)
+        start = time.perf_counter()
+        result["cleanup"] = joint.cleanup(obj)
+        stages["cleanup"] = time.perf_counter()-start
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+        clear_scene()
+        return result
+
+    mesh = fdm_joints.mesh_to_data(obj.data)
+    result["stages"] = dict(stages) # the motion check below goes through the same wrappers
+    result["verts"] = len(mesh.verts)
+    result["faces"] = len(mesh.totals)
+    result["edges"] = geometry.edge_stats(mesh)
+    result["valid"] = len(mesh.totals) > 0 and not any(result["edges"].values())
+    # the range of motion check of the finished joint, timed apart from the generation
+    try:
+        check = motion.sweep(joint,mesh)
+        result["motion"] = {"time": check["time"],"poses": check["poses"],"points": check["points"],
+                            "min_clearance": check["min_clearance"],"collisions": len(check["collisions"])}
+    except RuntimeError as err:
+        result["motion"] = {"error": str(err)}
+    clear_scene()
+    return result
+
+def main():
+    args = sweep.parse_args("Time the generation of complete joints","bench_blender.json")
+    clear_scene()
+    results = []
+    for params in sweep.grid(args):
+        results.append(sweep.fastest([run(params) for i in range(args.repeat)]))
+        print(results[-1]["type"],results[-1]["size"],results[-1]["clearance"],results[-1]["resolution"],
+              results[-1].get("error") or f"{sum(results[-1]['stages'].values()):.3f} s, motion check {results[-1]['motion'].get('time',0):.3f} s")
+    sys.exit(1 if sweep.write_results(args.output,results,benchmark="blender",blender=bpy.app.version_string) else 0)
+
+if __name__ == "__main__":
+    main()
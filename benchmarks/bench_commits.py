@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import importlib.util
+
+# Before/after timing of whole joints across commits, runs in Blender. Only
+# HPaulsen_FDMJoint(...).joint() is used, which every version of the add-on has,
+# so an older commit can be timed from a git worktree:
+#   git worktree add ../fdm_baseline <commit>
+#   blender -b --factory-startup --python benchmarks/bench_commits.py -- --addon-dir ../fdm_baseline --output before.json
+#   blender -b --factory-startup --python benchmarks/bench_commits.py -- --output after.json --before before.json
+# With --before the total time per joint type is compared with the earlier run.
+
+import bpy
+import bmesh
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+import sweep
+
+def options(parser):
+    parser.add_argument("--addon-dir",default=sweep.ADDON_DIR,help="checkout of the add-on to time")
+    parser.add_argument("--before",help="results of an earlier run to compare with")
+
+def load_addon(addon_dir):
+    spec = importlib.util.spec_from_file_location("fdm_joints",os.path.join(addon_dir,"__init__.py"),
+                                                  submodule_search_locations=[addon_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["fdm_joints"] = module
+    spec.loader.exec_module(module)
+    return module
+
+def clear_scene():
+    for obj in bpy.data.objects[:]:
+        bpy.data.objects.remove(obj)
+    for mesh in bpy.data.meshes[:]:
+        bpy.data.meshes.remove(mesh)
+
+def is_closed_manifold(mesh):
+    # older commits have no geometry.edge_stats
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    valid = len(bm.faces) > 0 and all(edge.is_manifold and edge.is_contiguous for edge in bm.edges)
+    bm.free()
+    return valid
+
+def run(fdm_joints,params):
+    result = dict(params)
+    geometry = sys.modules.get("fdm_joints.geometry") # older commits have no primitive memo
+    if hasattr(geometry,"clear_primitives"):
+        geometry.clear_primitives()
+    start = time.perf_counter()
+    try:
+        joint = fdm_joints.HPaulsen_FDMJoint(**params)
+    except RuntimeError as err:
+        result["error"] = str(err)
+        result["feasible"] = False # not a failure, these parameters aren't possible
+        return result
+    try:
+        obj = joint.joint()
+        result["time"] = time.perf_counter()-start
+        result["verts"] = len(obj.data.vertices)
+        result["faces"] = len(obj.data.polygons)
+        result["valid"] = is_closed_manifold(obj.data)
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+    clear_scene()
+    return result
+
+def key(result):
+    return tuple(result[name] for name in ("type","size","up_angle","down_angle","horizontal_angle","clearance","resolution"))
+
+def compare(before,after):
+    # total time per joint type over the parameter sets both runs generated successfully
+    times = {key(result): result["time"] for result in before if sweep.succeeded(result)}
+    totals = {}
+    for result in after:
+        if sweep.succeeded(result) and key(result) in times:
+            total = totals.setdefault(result["type"],[0,0.0,0.0])
+            total[0] += 1
+            total[1] += times[key(result)]
+            total[2] += result["time"]
+    for type,(count,old,new) in sorted(totals.items()):
+        print(f"{type}: {count} joints, before {old:.3f} s, after {new:.3f} s, {old/new:.2f}x")
+
+def main():
+    args = sweep.parse_args("Time complete joints of any commit","bench_commits.json",options)
+    fdm_joints = load_addon(os.path.abspath(args.addon_dir))
+    clear_scene()
+    results = []
+    for params in sweep.grid(args):
+        results.append(sweep.fastest([run(fdm_joints,params) for i in range(args.repeat)],lambda run: run["time"]))
+        print(results[-1]["type"],results[-1]["size"],results[-1]["clearance"],results[-1]["resolution"],
+              results[-1].get("error") or f"{results[-1]['time']:.3f} s")
+    failed = sweep.write_results(args.output,results,benchmark="commits",addon_dir=os.path.abspath(args.addon_dir),
+                                 blender=bpy.app.version_string)
+    if args.before:
+        with open(args.before) as f:
+            compare(json.load(f)["results"],results)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
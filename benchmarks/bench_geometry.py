@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+# Benchmark of the primitive generation, runs without Blender:
+#   python benchmarks/bench_geometry.py --output geometry.json
+# Exits with 1 if a possible parameter set gave an invalid mesh.
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+import sweep
+
+geometry = sweep.load_geometry()
+MESH_METHODS = [name for name in dir(geometry.JointGeometry) if name.endswith("_mesh")]
+
+def run(params):
+    result = dict(params)
+    geometry.clear_primitives() # time the generation, not the memo
+    try:
+        joint = geometry.JointGeometry(**params)
+    except RuntimeError as err:
+        result["error"] = str(err)
+        result["feasible"] = False # not a failure, these parameters aren't possible
+        return result
+    stages = {}
+    sweep.timed_methods(joint,stages,MESH_METHODS)
+    start = time.perf_counter()
+    base,steps = joint.plan()
+    stages["plan"] = time.perf_counter()-start
+    start = time.perf_counter()
+    operands = [(operation,geometry.pack_disjoint(meshes)) for operation,meshes in steps]
+    stages["pack"] = time.perf_counter()-start
+
+    meshes = [base]+[mesh for operation,packed in operands for mesh in packed]
+    result["stages"] = stages
+    result["operands"] = {operation: len(packed) for operation,packed in operands}
+    result["verts"] = sum(len(mesh.verts) for mesh in meshes)
+    result["faces"] = sum(len(mesh.totals) for mesh in meshes)
+    # every operand of the booleans has to be closed and manifold on its own
+    problems = [geometry.edge_stats(mesh) for mesh in meshes]
+    result["edges"] = {key: sum(problem[key] for problem in problems) for key in problems[0]}
+    result["valid"] = not any(result["edges"].values())
+    return result
+
+def main():
+    args = sweep.parse_args("Time the generation of the joint primitives","bench_geometry.json")
+    results = []
+    for params in sweep.grid(args):
+        results.append(sweep.fastest([run(params) for i in range(args.repeat)]))
+        print(results[-1]["type"],results[-1]["size"],results[-1]["clearance"],results[-1]["resolution"],
+              results[-1].get("error") or f"{1000*results[-1]['stages']['plan']:.2f} ms")
+    sys.exit(1 if sweep.write_results(args.output,results,benchmark="geometry",numpy=geometry.np.__version__) else 0)
+
+if __name__ == "__main__":
+    main()
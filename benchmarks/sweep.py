@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import itertools
+import importlib.util
+
+# Shared parameter sweep and result handling for the benchmarks
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_geometry():
+    # geometry.py doesn't depend on bpy, load it without the add-on package
+    spec = importlib.util.spec_from_file_location("fdm_joints_geometry",os.path.join(ADDON_DIR,"geometry.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def floats(text):
+    return [float(value) for value in text.split(",")]
+
+def ints(text):
+    return [int(value) for value in text.split(",")]
+
+def parse_args(description,default_output,options=None):
+    # Blender passes the script arguments after "--", options adds arguments of one benchmark
+    argv = sys.argv[sys.argv.index("--")+1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description=description)
+    if options:
+        options(parser)
+    parser.add_argument("--type",default="1SIDE,2SIDE",help="comma separated joint types")
+    parser.add_argument("--socket-width",type=floats,default=[2.8,4,6,10,20],help="comma separated socket widths in mm")
+    parser.add_argument("--clearance",type=floats,default=[0.2,0.3,0.5],help="comma separated clearances in mm")
+    parser.add_argument("--resolution",type=ints,default=[8,16,32,64,128,256],help="comma separated resolutions")
+    parser.add_argument("--up-angle",type=float,default=22.5,help="degrees")
+    parser.add_argument("--down-angle",type=float,default=22.5,help="degrees")
+    parser.add_argument("--horizontal-angle",type=float,default=45,help="degrees")
+    parser.add_argument("--repeat",type=int,default=1,help="runs per parameter set, the fastest is reported")
+    parser.add_argument("--output",default=default_output,help="JSON file for the results")
+    return parser.parse_args(argv)
+
+def grid(args):
+    # dicts of HPaulsen_FDMJoint arguments
+    for type,size,clearance,resolution in itertools.product(args.type.split(","),args.socket_width,args.clearance,args.resolution):
+        yield {
+            "type": type,
+            "size": size,
+            "up_angle": math.radians(args.up_angle),
+            "down_angle": math.radians(args.down_angle),
+            "horizontal_angle": math.radians(args.horizontal_angle),
+            "clearance": clearance,
+            "resolution": resolution
+        }
+
+def timed_methods(obj,timings,names):
+    # wrap methods of one instance so their accumulated wall time ends up in timings
+    for name in names:
+        method = getattr(obj,name)
+        def wrapper(*args,_method=method,_name=name,**kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args,**kwargs)
+            finally:
+                timings[_name] = timings.get(_name,0.0)+time.perf_counter()-start
+        setattr(obj,name,wrapper)
+
+def succeeded(run):
+    return "error" not in run and run.get("valid",True)
+
+def fastest(runs,time=lambda run: sum(run["stages"].values())):
+    # the fastest run that succeeded, or the first failed one if none did
+    good = [run for run in runs if succeeded(run)]
+    return min(good,key=time) if good else runs[0]
+
+def write_results(path,results,**meta):
+    meta.update({
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+    })
+    with open(path,"w") as f:
+        json.dump({"meta": meta,"results": results},f,indent=1)
+    # parameter sets that are possible but failed or produced an invalid mesh
+    failed = sum(1 for result in results if result.get("feasible",True) and not succeeded(result))
+    print(f"{len(results)} results written to {path}, {failed} failed or invalid")
+    return failed
@@ -0,0 +1,79 @@
+import bpy
+
+# In-session cache of finished joint meshes, keyed on the full parameter
+# tuple of HPaulsen_FDMJoint. Only mesh names are kept since datablock
+# references become invalid after undo, together with a copy of the mesh
+# arrays so a mesh that was removed by undo can be rebuilt without
+# generating it again.
+MAX_ENTRIES = 32
+KEY_PROP = "fdm_joint_key"
+
+_entries = {} # key -> [mesh name, MeshData], oldest first
+_last = None # (key, MeshData) of the latest joint, kept even when caching is off
+_faces_before = {} # key -> number of faces of a reduced joint before it was reduced
+
+def lookup(key):
+    entry = _entries.pop(key,None)
+    if entry is None:
+        return None
+    _entries[key] = entry # most recently used
+    mesh = bpy.data.meshes.get(entry[0])
+    if mesh is None or mesh.get(KEY_PROP) != repr(key):
+        return None
+    return mesh
+
+def snapshot(key):
+    # the mesh arrays of a cached joint, or of the latest joint
+    if key in _entries:
+        return _entries[key][1]
+    return last(key)
+
+def last(key):
+    # the mesh arrays of the latest joint if it has this key
+    if _last is not None and _last[0] == key:
+        return _last[1]
+    return None
+
+def store(key,mesh,data):
+    global _last
+    mesh[KEY_PROP] = repr(key)
+    _entries.pop(key,None)
+    # evict first, the new mesh may not have any users yet
+    evict(MAX_ENTRIES-1)
+    _entries[key] = [mesh.name,data]
+    _last = (key,data)
+
+def remember(key,data):
+    # keep only the latest joint, used to redo the operator without caching
+    global _last
+    _last = (key,data)
+
+def forget_last():
+    # a new run of the operator, its redo must not pick up an earlier joint
+    global _last
+    _last = None
+
+def remember_reduction(key,faces):
+    _faces_before[key] = faces
+
+def faces_before(key):
+    return _faces_before.get(key)
+
+def evict(max_entries=MAX_ENTRIES):
+    # purge orphaned meshes, entries whose mesh was removed (e.g. by undo)
+    # keep their arrays until they fall out of the limit
+    for key,(name,data) in list(_entries.items()):
+        mesh = bpy.data.meshes.get(name)
+        if mesh is not None and mesh.get(KEY_PROP) == repr(key) and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    # least recently used entries beyond the limit are forgotten, the meshes
+    # themselves still belong to the joints using them
+    while len(_entries) > max_entries:
+        del _entries[next(iter(_entries))]
+
+def invalidate():
+    global _last
+    evict(0)
+    _entries.clear()
+    _faces_before.clear()
+    _last = None
@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import itertools
+import subprocess
+import importlib.util
+
+# Generates a grid of joints without the UI and exports every joint as STL or OBJ:
+#   blender -b --factory-startup --python cli.py -- --socket-width 4,6 --clearance 0.2,0.3 --workers 4 --output-dir joints
+# The grid is split across worker Blender processes, manifest.json in the output
+# directory lists the file, timings and any error of every joint.
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_addon():
+    spec = importlib.util.spec_from_file_location("fdm_joints",os.path.join(ADDON_DIR,"__init__.py"),
+                                                  submodule_search_locations=[ADDON_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["fdm_joints"] = module
+    spec.loader.exec_module(module)
+    return module
+
+def floats(text):
+    return [float(value) for value in text.split(",")]
+
+def ints(text):
+    return [int(value) for value in text.split(",")]
+
+def parse_args():
+    # Blender passes the script arguments after "--"
+    argv = sys.argv[sys.argv.index("--")+1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="cli.py",description="Generate a grid of FDM joints and export them")
+    parser.add_argument("--type",default="1SIDE",help="comma separated joint types, 1SIDE and/or 2SIDE")
+    parser.add_argument("--socket-width",type=floats,default=[4],help="comma separated socket widths in mm")
+    parser.add_argument("--clearance",type=floats,default=[0.3],help="comma separated clearances in mm")
+    parser.add_argument("--resolution",type=ints,default=[64],help="comma separated resolutions")
+    parser.add_argument("--up-angle",type=floats,default=[22.5],help="comma separated angles in degrees")
+    parser.add_argument("--down-angle",type=floats,default=[22.5],help="comma separated angles in degrees")
+    parser.add_argument("--horizontal-angle",type=floats,default=[45],help="comma separated angles in degrees")
+    parser.add_argument("--format",choices=["STL","OBJ"],default="STL",help="file format of the exported joints")
+    parser.add_argument("--output-dir",default="fdm_joints",help="directory for the exported joints and manifest.json")
+    parser.add_argument("--workers",type=int,default=os.cpu_count() or 1,help="number of Blender processes, 1 generates in this process")
+    parser.add_argument("--worker",help=argparse.SUPPRESS) # jobs file of a worker process
+    parser.add_argument("--results",help=argparse.SUPPRESS) # results file of a worker process
+    return parser.parse_args(argv)
+
+def grid(args):
+    # dicts of HPaulsen_FDMJoint arguments
+    for type,size,clearance,resolution,up,down,horizontal in itertools.product(
+            args.type.split(","),args.socket_width,args.clearance,args.resolution,
+            args.up_angle,args.down_angle,args.horizontal_angle):
+        yield {
+            "type": type,
+            "size": size,
+            "up_angle": math.radians(up),
+            "down_angle": math.radians(down),
+            "horizontal_angle": math.radians(horizontal),
+            "clearance": clearance,
+            "resolution": resolution
+        }
+
+def file_name(params,format):
+    return (f"fdm_joint_{params['type'].lower()}_w{params['size']:g}_c{params['clearance']:g}_r{params['resolution']}"
+            f"_u{math.degrees(params['up_angle']):g}_d{math.degrees(params['down_angle']):g}"
+            f"_h{math.degrees(params['horizontal_angle']):g}.{format.lower()}")
+
+def export(obj,path,format):
+    for other in bpy.context.selected_objects[:]:
+        other.select_set(False)
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+    if format == "STL":
+        bpy.ops.wm.stl_export(filepath=path,export_selected_objects=True)
+    else:
+        bpy.ops.wm.obj_export(filepath=path,export_selected_objects=True,export_materials=False,forward_axis='Y',up_axis='Z')
+
+def run(fdm_joints,job,output_dir,format):
+    result = dict(job)
+    start = time.perf_counter()
+    try:
+        joint = fdm_joints.HPaulsen_FDMJoint(**job["params"])
+        obj = joint.joint()
+    except RuntimeError as err:
+        result["error"] = str(err)
+        return result
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+        return result
+    result["generate_time"] = time.perf_counter()-start
+    result["verts"] = len(obj.data.vertices)
+    result["faces"] = len(obj.data.polygons)
+    path = os.path.join(output_dir,file_name(job["params"],format))
+    start = time.perf_counter()
+    try:
+        export(obj,path,format)
+        result["file"] = os.path.basename(path)
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+    result["export_time"] = time.perf_counter()-start
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+    return result
+
+def work(jobs,output_dir,format):
+    fdm_joints = load_addon()
+    for obj in bpy.data.objects[:]:
+        bpy.data.objects.remove(obj)
+    results = []
+    for job in jobs:
+        results.append(run(fdm_joints,job,output_dir,format))
+        print(f"FDMJoint: {results[-1].get('file') or results[-1]['error']}")
+    return results
+
+def spawn(shards,output_dir,format,temp_dir):
+    # one background Blender per shard, all running at the same time
+    workers = []
+    for i,jobs in enumerate(shards):
+        jobs_path = os.path.join(temp_dir,f"jobs_{i}.json")
+        results_path = os.path.join(temp_dir,f"results_{i}.json")
+        with open(jobs_path,"w") as f:
+            json.dump(jobs,f)
+        command = [bpy.app.binary_path,"-b","--factory-startup","--python",os.path.abspath(__file__),"--",
+                   "--worker",jobs_path,"--results",results_path,"--output-dir",output_dir,"--format",format]
+        workers.append((jobs,results_path,subprocess.Popen(command)))
+
+    results = []
+    for jobs,results_path,process in workers:
+        code = process.wait()
+        try:
+            with open(results_path) as f:
+                results += json.load(f)
+        except (OSError,ValueError):
+            # jobs of a crashed worker are reported as failed
+            results += [dict(job,error=f"Worker exited with code {code}") for job in jobs]
+    return results
+
+def main():
+    args = parse_args()
+    output_dir = os.path.abspath(args.output_dir)
+    if args.worker:
+        with open(args.worker) as f:
+            jobs = json.load(f)
+        results = work(jobs,output_dir,args.format)
+        with open(args.results,"w") as f:
+            json.dump(results,f)
+        return
+
+    os.makedirs(output_dir,exist_ok=True)
+    jobs = [{"index": i,"params": params} for i,params in enumerate(grid(args))]
+    workers = max(1,min(args.workers,len(jobs)))
+    start = time.perf_counter()
+    if workers == 1:
+        results = work(jobs,output_dir,args.format)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = spawn([jobs[i::workers] for i in range(workers)],output_dir,args.format,temp_dir)
+    results.sort(key=lambda result: result["index"])
+
+    failed = sum(1 for result in results if "error" in result)
+    manifest = {
+        "meta": {
+            "blender": bpy.app.version_string,
+            "format": args.format,
+            "workers": workers,
+            "wall_time": time.perf_counter()-start,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "jobs": len(results),
+            "failed": failed
+        },
+        "results": results
+    }
+    with open(os.path.join(output_dir,"manifest.json"),"w") as f:
+        json.dump(manifest,f,indent=1)
+    print(f"FDMJoint: {len(results)-failed} joints written to {output_dir}, {failed} failed")
+
+if __name__ == "__main__":
+    main()
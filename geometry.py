@@ -0,0 +1,645 @@
+import math
+import functools
+import threading
+import numpy as np
+
+# Pure NumPy geometry kernel for the joint primitives. Nothing in here may
+# import bpy so the geometry can be generated and tested outside of Blender.
+
+NOZZLE_WIDTH = 0.4 # the joints are designed for 0.4 mm nozzles
+
+@functools.lru_cache(maxsize=None)
+def unit_circle(resolution):
+    # sin/cos of i*2*pi/resolution, computed once per resolution
+    a = np.arange(resolution)*(2*math.pi/resolution)
+    sin = np.sin(a)
+    cos = np.cos(a)
+    sin.flags.writeable = False
+    cos.flags.writeable = False
+    return sin,cos
+
+def loopx(r,x,resolution):
+    sin,cos = unit_circle(resolution)
+    return np.stack((np.full(resolution,x,dtype=np.float64),r*sin,r*cos),axis=1)
+
+def loopz(r,z,resolution,yscale=1.0):
+    sin,cos = unit_circle(resolution)
+    return np.stack((r*sin,r*cos*yscale,np.full(resolution,z,dtype=np.float64)),axis=1)
+
+def loopy(r,y,resolution):
+    sin,cos = unit_circle(resolution)
+    return np.stack((r*sin,np.full(resolution,y,dtype=np.float64),r*cos),axis=1)
+
+class MeshData:
+    # contiguous float32 vertex coordinates (n,3), the int32 vertex index of every
+    # face corner (loop) and the int32 number of corners of every face
+    def __init__(self,verts,loops,totals):
+        self.verts = np.ascontiguousarray(verts,dtype=np.float32).reshape(-1,3)
+        self.loops = np.ascontiguousarray(loops,dtype=np.int32).ravel()
+        self.totals = np.ascontiguousarray(totals,dtype=np.int32).ravel()
+
+    @property
+    def starts(self):
+        starts = np.zeros(len(self.totals),dtype=np.int32)
+        np.cumsum(self.totals[:-1],out=starts[1:])
+        return starts
+
+    def faces(self):
+        return [tuple(face.tolist()) for face in np.split(self.loops,self.starts[1:])]
+
+    def bounds(self):
+        return self.verts.min(axis=0),self.verts.max(axis=0)
+
+    def transformed(self,matrix=None,offset=None):
+        # matrix is a 3x3 rotation, mirroring matrices would also need the faces flipped
+        verts = self.verts
+        if matrix is not None:
+            verts = verts@np.asarray(matrix,dtype=np.float32).T
+        if offset is not None:
+            verts = verts+np.asarray(offset,dtype=np.float32)
+        return MeshData(verts,self.loops,self.totals)
+
+    def flipped(self):
+        # the same mesh with every face reversed
+        starts = np.repeat(self.starts,self.totals)
+        local = np.arange(len(self.loops))-starts
+        return MeshData(self.verts,self.loops[starts+np.repeat(self.totals,self.totals)-1-local],self.totals)
+
+ROT_Z180 = np.diag((-1.0,-1.0,1.0))
+
+def concatenate(meshes):
+    offsets = np.cumsum([0]+[len(mesh.verts) for mesh in meshes[:-1]])
+    return MeshData(
+        np.concatenate([mesh.verts for mesh in meshes]),
+        np.concatenate([mesh.loops+offset for mesh,offset in zip(meshes,offsets)]),
+        np.concatenate([mesh.totals for mesh in meshes]))
+
+def edge_stats(mesh):
+    # counts of boundary edges (one face), non-manifold edges (more than two faces)
+    # and edges whose faces disagree on the winding. A watertight, manifold and
+    # consistently oriented mesh has none of them.
+    nxt = np.arange(1,len(mesh.loops)+1)
+    nxt[mesh.starts+mesh.totals-1] = mesh.starts
+    a = mesh.loops.astype(np.int64)
+    b = mesh.loops[nxt].astype(np.int64)
+    n = len(mesh.verts)
+    undirected,counts = np.unique(np.minimum(a,b)*n+np.maximum(a,b),return_counts=True)
+    directed,directed_counts = np.unique(a*n+b,return_counts=True)
+    return {
+        "boundary": int(np.count_nonzero(counts == 1)),
+        "non_manifold": int(np.count_nonzero(counts > 2)),
+        "inconsistent": int(np.count_nonzero(directed_counts > 1))
+    }
+
+def pack_disjoint(meshes,margin=1e-4):
+    # meshes whose bounding boxes don't touch can be concatenated instead of
+    # being unioned, this merges them into as few meshes as possible
+    groups = []
+    for mesh in meshes:
+        lo,hi = mesh.bounds()
+        for group,bounds in groups:
+            if all(np.any(lo > other_hi+margin) or np.any(hi < other_lo-margin) for other_lo,other_hi in bounds):
+                group.append(mesh)
+                bounds.append((lo,hi))
+                break
+        else:
+            groups.append(([mesh],[(lo,hi)]))
+    return [concatenate(group) if len(group) > 1 else group[0] for group,bounds in groups]
+
+class MeshBuilder:
+    def __init__(self):
+        self.count = 0
+        self._verts = []
+        self._faces = []
+
+    def add_verts(self,verts):
+        # returns the index of the first added vertex
+        verts = np.asarray(verts,dtype=np.float64).reshape(-1,3)
+        start = self.count
+        self._verts.append(verts)
+        self.count += len(verts)
+        return start
+
+    def add_faces(self,faces):
+        # a 2d array of equally sized faces, or a sequence of index tuples
+        if isinstance(faces,np.ndarray) and faces.ndim == 2:
+            self._faces.append(faces.astype(np.int32))
+        else:
+            self._faces += [np.asarray(face,dtype=np.int32).reshape(1,-1) for face in faces]
+
+    def bridge(self,prior,last,n,reverse_normals=False,last_n=None):
+        # quads between two loops of n vertices starting at prior and last,
+        # or triangles if the last loop has a different number of vertices
+        if last_n is not None and last_n != n:
+            self.bridge_uneven(prior,n,last,last_n,reverse_normals)
+            return
+        j = np.arange(n)
+        k = (j+1)%n
+        if not reverse_normals:
+            self.add_faces(np.stack((prior+k,prior+j,last+j,last+k),axis=1))
+        else:
+            self.add_faces(np.stack((last+k,last+j,prior+j,prior+k),axis=1))
+
+    def bridge_uneven(self,prior,prior_n,last,last_n,reverse_normals=False):
+        # Both loops start at the same angle, walk around them together always stepping
+        # along the loop whose next vertex comes first. Stepping along the prior loop
+        # adds the triangle (p1,p0,l0), stepping along the last loop adds (p0,l0,l1),
+        # which is how bridge splits its quads when both loops are the same size.
+        steps = np.concatenate((np.arange(1,prior_n+1)/prior_n,np.arange(1,last_n+1)/last_n))
+        order = np.argsort(steps,kind="stable")
+        on_prior = order < prior_n
+        p = np.cumsum(on_prior)-on_prior # steps taken along each loop so far
+        l = np.cumsum(~on_prior)-~on_prior
+        p0 = prior+p%prior_n
+        p1 = prior+(p+1)%prior_n
+        l0 = last+l%last_n
+        l1 = last+(l+1)%last_n
+        faces = np.where(on_prior[:,np.newaxis],np.stack((p1,p0,l0),axis=1),np.stack((p0,l0,l1),axis=1))
+        self.add_faces(faces[:,::-1] if reverse_normals else faces)
+
+    def fan(self,tip,start,n,reverse_normals=False):
+        # triangles between a single vertex and a loop of n vertices
+        j = np.arange(n)
+        k = (j+1)%n
+        tip = np.full(n,tip)
+        if not reverse_normals:
+            self.add_faces(np.stack((tip,start+j,start+k),axis=1))
+        else:
+            self.add_faces(np.stack((tip,start+k,start+j),axis=1))
+
+    def cap(self,start,n,reverse_normals=False):
+        # a single n-gon closing a loop
+        face = start+np.arange(n)
+        self.add_faces((face[::-1] if reverse_normals else face).reshape(1,-1))
+
+    def build(self):
+        verts = np.concatenate(self._verts)
+        loops = np.concatenate([faces.ravel() for faces in self._faces])
+        totals = np.concatenate([np.full(len(faces),faces.shape[1],dtype=np.int32) for faces in self._faces])
+        return MeshData(verts,loops,totals)
+
+OVERLAP = 0.3 #max(0.3,size/20) # each side
+PRINT_ANGLE = math.radians(45) # don't change without verifying areas where this is assumed
+BRIDGEABLE_R = 1.5 # max safe bridgeable distance
+V_CLEARANCE = 0.6 # clearance between axle and roof of socket
+V_CLEARANCE_MAX = 2 # max clearance between axle and roof of socket
+
+def solve(size,clearance,horizontal_angle=PRINT_ANGLE):
+    # The dimensions that decide whether a joint is possible, for whole arrays of
+    # socket widths, clearances and horizontal angle limits (broadcast together)
+    # without generating any geometry. Values where "feasible" is False are meaningless.
+    size,clearance,horizontal_angle = np.broadcast_arrays(np.asarray(size,dtype=np.float64),
+                                                          np.asarray(clearance,dtype=np.float64),
+                                                          np.asarray(horizontal_angle,dtype=np.float64))
+    half_arm_width = np.maximum(0.6,0.3*size/2)
+    wall_width = np.maximum(0.8,0.25*size/2)
+    axle_min_r = np.maximum(0.4,size/6) # the radius of the endpoint of the "ball"
+    axle_major_r = size/2-clearance
+    axle_x_squared = axle_major_r*axle_major_r-axle_min_r*axle_min_r
+    axle_x = np.sqrt(np.maximum(axle_x_squared,0))
+    axle_r = axle_min_r+(axle_x-half_arm_width)/math.tan(PRINT_ANGLE) #axle_min_r+OVERLAP+clearance
+    feasible = (axle_x_squared >= 0)&(axle_x-OVERLAP >= half_arm_width+clearance)
+
+    # how far the arm could turn sideways, and how far it may with the limit
+    max_bendable_angle = np.arcsin(np.clip((axle_x-OVERLAP-half_arm_width)/(size/2+clearance),-1,1))
+    bendable_angle = np.clip(max_bendable_angle,0,np.maximum(horizontal_angle,0))
+
+    # height and radius of the roof of the socket
+    top = axle_r+V_CLEARANCE
+    topr = size/2-(top-axle_min_r)
+    d = topr-BRIDGEABLE_R
+    far = d > V_CLEARANCE_MAX
+    top = np.where(topr > BRIDGEABLE_R,np.where(far,axle_r+V_CLEARANCE_MAX,top+d),top)
+    topr = np.where(topr > BRIDGEABLE_R,np.where(far,size/2-(axle_r+V_CLEARANCE_MAX-axle_min_r),BRIDGEABLE_R),topr)
+
+    return {
+        "feasible": feasible,
+        "half_arm_width": half_arm_width,
+        "wall_width": wall_width,
+        "axle_min_r": axle_min_r,
+        "axle_major_r": axle_major_r,
+        "axle_x": axle_x,
+        "axle_r": axle_r,
+        "max_bendable_angle": max_bendable_angle,
+        "bendable_angle": bendable_angle,
+        "top": top,
+        "topr": topr,
+        "raise_z": 1.5*axle_r # somewhat arbitrary
+    }
+
+def min_size(clearance,lo=0.1,hi=1000.0,steps=40):
+    # the smallest possible socket width for each clearance, by bisection
+    clearance = np.asarray(clearance,dtype=np.float64)
+    lo = np.full(clearance.shape,lo)
+    hi = np.full(clearance.shape,hi)
+    for i in range(steps):
+        mid = (lo+hi)/2
+        feasible = solve(mid,clearance)["feasible"]
+        hi = np.where(feasible,mid,hi)
+        lo = np.where(feasible,lo,mid)
+    return hi
+
+def max_clearance(size,steps=40):
+    # the largest possible clearance for each socket width, by bisection, 0 if none is
+    size = np.asarray(size,dtype=np.float64)
+    lo = np.zeros(size.shape)
+    hi = size/2
+    for i in range(steps):
+        mid = (lo+hi)/2
+        feasible = solve(size,mid)["feasible"]
+        lo = np.where(feasible,mid,lo)
+        hi = np.where(feasible,hi,mid)
+    return np.where(solve(size,lo)["feasible"],lo,0.0)
+
+MAX_PRIMITIVES = 64
+_primitives = {} # (method, parameters, arguments) -> MeshData, oldest first
+_primitives_lock = threading.Lock() # plans may be generated on worker threads
+
+def primitive(method):
+    # A primitive only depends on the joint parameters and its arguments, so it is
+    # generated once and shared by every joint that needs it, of either type. The
+    # shared arrays are made read-only, copies are derived with transformed().
+    @functools.wraps(method)
+    def wrapper(self,*args):
+        key = (method.__name__,JointGeometry.cache_key(self)[1:],tuple(round(arg,9) for arg in args))
+        with _primitives_lock:
+            mesh = _primitives.pop(key,None)
+            if mesh is not None:
+                _primitives[key] = mesh # most recently used
+                return mesh
+        mesh = method(self,*args)
+        for array in (mesh.verts,mesh.loops,mesh.totals):
+            array.flags.writeable = False
+        with _primitives_lock:
+            while len(_primitives) >= MAX_PRIMITIVES:
+                del _primitives[next(iter(_primitives))]
+            _primitives[key] = mesh
+        return mesh
+    return wrapper
+
+def clear_primitives():
+    with _primitives_lock:
+        _primitives.clear()
+
+class JointGeometry:
+    def __init__(self,type,size,up_angle,down_angle,horizontal_angle,clearance,resolution,tolerance=None):
+        self.type = type
+        self.size = size # min size ~ 2.9mm
+        self.resolution = resolution
+        self.tolerance = tolerance # max chord error of curved parts, None to use the resolution everywhere
+
+        self.up_angle = up_angle
+        self.down_angle = down_angle
+        self.horizontal_angle = horizontal_angle
+
+        self.clearance = clearance # 0.3 seems generous, but is about the minimum recommended
+        self.overlap = OVERLAP
+        self.print_angle = PRINT_ANGLE
+        self.a_step = 2*math.pi/resolution
+        self.bridgeable_r = BRIDGEABLE_R
+        self.v_clearance = V_CLEARANCE
+        self.v_clearance_max = V_CLEARANCE_MAX
+        self.bottom = 1.5*self.size # how low to go, rather arbitrary - just has to be long enough to be below z=0
+
+        solution = solve(size,clearance,horizontal_angle)
+        if not solution["feasible"]:
+            raise RuntimeError("FDMJoint: Axle size is too small and/or Clearance is too large")
+        for name,value in solution.items():
+            setattr(self,name,value.item())
+
+        self.arm_length = self.size/2+self.wall_width+2*self.clearance#2*self.size
+        self.separator_outer_r = 2*self.size
+        self.separator_y = self.size/2+self.wall_width
+        self.bottom_r = self.axle_x-self.overlap
+
+    def cache_key(self):
+        # everything that affects the generated mesh
+        return (self.type,round(self.size,6),round(self.up_angle,6),round(self.down_angle,6),
+                round(self.horizontal_angle,6),round(self.clearance,6),self.resolution,
+                round(self.tolerance,6) if self.tolerance else None)
+
+    def params(self):
+        # the arguments this joint was created with
+        return {
+            "type": self.type,
+            "size": self.size,
+            "up_angle": self.up_angle,
+            "down_angle": self.down_angle,
+            "horizontal_angle": self.horizontal_angle,
+            "clearance": self.clearance,
+            "resolution": self.resolution,
+            "tolerance": self.tolerance
+        }
+
+    def segments(self,r):
+        # The number of vertices of a loop of radius r. Without a tolerance this is the
+        # resolution, otherwise the fewest (a multiple of 4, at least 8) for which the
+        # chords stay within the tolerance of the circle, but never more than the resolution.
+        if not self.tolerance:
+            return self.resolution
+        half_angle = math.acos(max(1-self.tolerance/max(r,1e-9),-1))
+        n = 4*math.ceil(math.pi/half_angle/4)
+        return max(8,min(n,self.resolution))
+
+    def socket_top(self):
+        # height and radius of the roof of the socket
+        return self.top,self.topr
+
+    @primitive
+    def socket_mesh(self):
+        n = self.segments(self.size/2)
+        m = MeshBuilder()
+
+        bottom = -self.axle_min_r-self.size/2
+        tip = m.add_verts((0,0,bottom))
+        ring = m.add_verts(loopz(self.size/2,-self.axle_min_r,n))
+        m.fan(tip,ring,n)
+        prior,ring = ring,m.add_verts(loopz(self.size/2,self.axle_min_r,n))
+        m.bridge(prior,ring,n)
+
+        top,topr = self.socket_top()
+        top_n = self.segments(topr)
+        prior,ring = ring,m.add_verts(loopz(topr,top,top_n))
+        m.bridge(prior,ring,n,last_n=top_n)
+        m.cap(ring,top_n,reverse_normals=True)
+
+        return m.build()
+
+    @primitive
+    def axle_mesh(self):
+        end_n = self.segments(self.axle_min_r)
+        n = self.segments(self.axle_r)
+        m = MeshBuilder()
+
+        straight_x = self.axle_x-(self.axle_r-self.axle_min_r)
+        straight_x = max(straight_x,self.half_arm_width+0.0001)
+
+        ring = m.add_verts(loopx(self.axle_min_r,-self.axle_x,end_n))
+        m.cap(ring,end_n)
+        prior,ring = ring,m.add_verts(loopx(self.axle_r,-straight_x,n))
+        m.bridge(prior,ring,end_n,last_n=n)
+        loop = loopx(self.axle_r,-self.half_arm_width,n)
+        below = loop[:,2] < 0
+        loop[below,2] -= loop[below,0]+straight_x
+        prior,ring = ring,m.add_verts(loop)
+        m.bridge(prior,ring,n)
+        loop = loopx(self.axle_r,self.half_arm_width,n)
+        below = loop[:,2] < 0
+        loop[below,2] += loop[below,0]-straight_x
+        prior,ring = ring,m.add_verts(loop)
+        m.bridge(prior,ring,n)
+        prior,ring = ring,m.add_verts(loopx(self.axle_r,straight_x,n))
+        m.bridge(prior,ring,n)
+        prior,ring = ring,m.add_verts(loopx(self.axle_min_r,self.axle_x,end_n))
+        m.bridge(prior,ring,n,last_n=end_n)
+        m.cap(ring,end_n,reverse_normals=True)
+
+        return m.build()
+
+    @primitive
+    def arm_mesh(self):
+        verts = []
+        faces = []
+
+        x = self.half_arm_width
+
+        verts += [(-x,0,self.axle_min_r),(x,0,self.axle_min_r),(-x,self.arm_length,self.axle_min_r),(x,self.arm_length,self.axle_min_r)]
+        faces += [(0,1,3,2)]
+
+        arm_start_z = self.axle_r*math.cos(self.print_angle)+self.axle_x-self.half_arm_width-(self.axle_r-self.axle_min_r)
+        arm_start_y = self.axle_r*math.sin(self.print_angle)
+
+        verts += [(-x,-arm_start_y,-arm_start_z),(x,-arm_start_y,-arm_start_z)]
+        faces += [(4,5,1,0)]
+
+        d = self.arm_length+arm_start_y
+        verts += [(-x,-arm_start_y+d,-arm_start_z-d),(x,-arm_start_y+d,-arm_start_z-d)]
+        faces += [(6,7,5,4),(2,3,7,6)]
+
+        faces += [(0,2,6,4),(5,7,3,1)]
+
+        m = MeshBuilder()
+        m.add_verts(verts)
+        m.add_faces(faces)
+        return m.build()
+
+    @primitive
+    def arm_space_mesh(self,depth=0):
+        verts = []
+        faces = []
+
+        r = self.axle_major_r+self.clearance
+        y = -r*math.cos(self.down_angle-self.print_angle)
+        # note: the following may need to remove the last term if popping-out through the bottom occurs.
+        x = self.half_arm_width+self.clearance-y*math.sin(self.bendable_angle)
+        y = y*math.cos(self.bendable_angle)
+        z = r*math.sin(self.down_angle-self.print_angle)
+        verts += [(-x,y,z),(x,y,z)]
+        h = self.bottom+z
+        y = y-h*math.tan(self.down_angle-self.print_angle)
+        x = self.half_arm_width+self.clearance+abs(y*math.sin(self.bendable_angle))
+        verts += [(-x,y,-self.bottom),(x,y,-self.bottom)]
+        faces += [(2,3,1,0)]
+
+        if y < 0:
+            x = self.half_arm_width+self.clearance
+            y = 0
+            z = -self.bottom
+            verts += [(-x,y,z),(x,y,z)]
+            faces += [(0,4,2),(1,3,5),(3,2,4,5)]
+
+        x = self.half_arm_width+self.clearance
+        y = 0
+        z = self.axle_min_r
+        verts += [(-x,y,z),(x,y,z)]
+        l = len(verts)-1
+        faces += [(0,1,l,l-1),(0,l-1,l-3),(1,l-2,l)]
+
+        if 0 == depth:
+            y = self.arm_length-self.clearance
+        else:
+            y = depth
+        x = y*math.tan(self.bendable_angle)+self.half_arm_width
+        x = max(x,self.half_arm_width+self.clearance)
+        z = -self.bottom
+        z_far_top = self.axle_min_r+y*math.tan(self.up_angle)
+        verts += [(-x,y,z_far_top),(x,y,z_far_top),(-x,y,z),(x,y,z)]
+        faces += [(l-1,l+1,l+3,l-3),(l-2,l+4,l+2,l),(l-3,l+3,l+4,l-2)]
+
+        verts += [(0,0,self.axle_min_r+(self.clearance+self.half_arm_width)*math.tan(self.print_angle)),(0,y,z_far_top+x*math.tan(self.print_angle))]
+        faces += [(l-1,l,l+5),(l+1,l-1,l+5,l+6),(l,l+2,l+6,l+5),(l+1,l+6,l+2,l+4,l+3)]
+
+        m = MeshBuilder()
+        m.add_verts(verts)
+        m.add_faces(faces)
+        return m.build()
+
+    def separator_surface(self,tip_y,xz_radius,h_angle,up_angle,down_angle):
+        # the vertex rings of the cone side of a separator: the ring where it meets the
+        # cylinder of radius xz_radius and the rings on the sphere of radius tip_y,
+        # shrinking towards the tip at (0,tip_y,0). Every ring is an upper and a lower half.
+        final_up_r = tip_y*math.sin(up_angle)
+        final_up_y = tip_y*math.cos(up_angle)
+        final_h_r = tip_y*math.sin(h_angle)
+        final_h_y = tip_y*math.cos(h_angle)
+        final_down_r = tip_y*math.sin(down_angle)
+        final_down_y = tip_y*math.cos(down_angle)
+
+        def ring_half(r):
+            # vertices in each half of a ring, 2*half is the resolution when it is even
+            num_verts_above_below = math.floor((self.segments(r)-1)/2)
+            return num_verts_above_below+1
+
+        # the large side of the cone is found from the points
+        # that intersect a cylinder of radius xz_radius
+        a = np.arange(ring_half(xz_radius))*2*math.pi/self.segments(xz_radius)
+        x = xz_radius*np.cos(a)
+        z = xz_radius*np.sin(a)
+        def cone_y(d,final_r,final_y,angle):
+            # points inside final_r lie on the sphere of radius tip_y
+            return np.where(d < final_r,np.sqrt(np.maximum(tip_y*tip_y-d*d,0)),final_y-(d-final_r)*math.tan(angle))
+        y_h = cone_y(np.abs(x),final_h_r,final_h_y,h_angle)
+        y_up = tip_y-(tip_y-y_h)*np.abs(np.cos(a))-(tip_y-cone_y(z,final_up_r,final_up_y,up_angle))*np.sin(a)
+        y_down = tip_y-(tip_y-y_h)*np.abs(np.cos(a))-(tip_y-cone_y(z,final_down_r,final_down_y,down_angle))*np.sin(a)
+        large = np.concatenate((np.stack((-x,y_up,z),axis=1),np.stack((x,y_down,-z),axis=1)))
+
+        # the small side of the cone and the spherical part
+        a_h_max = max(math.asin(final_h_r/tip_y),0.001)
+        a_up_max = math.asin(final_up_r/tip_y)
+        a_down_max = math.asin(final_down_r/tip_y)
+        max_angle = max(a_h_max,a_up_max,a_down_max)
+        num_rings = math.floor(max_angle*self.segments(tip_y)/(2*math.pi))
+        rings = []
+        # the first ring is the small side of the cone
+        for scale in np.arange(max(num_rings,1),0,-1)/max(num_rings,1):
+            ring_n = self.segments(tip_y*math.sin(max_angle*scale))
+            ah = a_h_max*scale
+            a = -ah+np.arange(ring_half(tip_y*math.sin(max_angle*scale)))*4*ah/ring_n
+            b_up = a_up_max*scale*np.cos(a/ah*math.pi/2)
+            b_down = a_down_max*scale*np.cos(a/ah*math.pi/2)
+            rings.append(np.concatenate((
+                np.stack((tip_y*np.cos(b_up)*np.sin(a),tip_y*np.cos(b_up)*np.cos(a),tip_y*np.sin(b_up)),axis=-1),
+                np.stack((-tip_y*np.cos(b_down)*np.sin(a),tip_y*np.cos(b_down)*np.cos(a),-tip_y*np.sin(b_down)),axis=-1))))
+        return large,rings
+
+    @primitive
+    def separator_mesh(self,tip_y,xz_radius,h_angle,up_angle,down_angle):
+        large,rings = self.separator_surface(tip_y,xz_radius,h_angle,up_angle,down_angle)
+        n = len(large)
+        m = MeshBuilder()
+
+        # create the end of the cylinder
+        end = large.copy()
+        end[:,1] = 4*xz_radius
+        ring = m.add_verts(end)
+        m.cap(ring,n)
+        prior,ring = ring,m.add_verts(large)
+        m.bridge(prior,ring,n)
+        for loop in rings:
+            prior,ring = ring,m.add_verts(loop)
+            m.bridge(prior,ring,n,last_n=len(loop))
+            n = len(loop)
+
+        # create the tip
+        tip = m.add_verts((0,tip_y,0))
+        m.fan(tip,ring,n,reverse_normals=True)
+
+        return m.build()
+
+    @primitive
+    def separator_lens_mesh(self,tip_y,xz_radius,h_angle,up_angle,down_angle,offset):
+        # The intersection of a separator moved by -offset along y with the same separator
+        # rotated by 180 degrees and moved by +offset. A separator is symmetric in x, so the
+        # rotated copy is its mirror image in y and the two cone sides can be joined by
+        # the cylinder wall directly, which is watertight by construction.
+        large,rings = self.separator_surface(tip_y,xz_radius,h_angle,up_angle,down_angle)
+        m = MeshBuilder()
+
+        starts = []
+        for mirror in (False,True):
+            sign = np.array((1,-1,1)) if mirror else np.array((1,1,1))
+            place = lambda verts: (np.asarray(verts)-(0,offset,0))*sign
+            n = len(large)
+            ring = m.add_verts(place(large))
+            starts.append(ring)
+            for loop in rings:
+                prior,ring = ring,m.add_verts(place(loop))
+                m.bridge(prior,ring,n,reverse_normals=mirror,last_n=len(loop))
+                n = len(loop)
+            tip = m.add_verts(place((0,tip_y,0)))
+            m.fan(tip,ring,n,reverse_normals=not mirror)
+        m.bridge(starts[1],starts[0],len(large))
+
+        return m.build()
+
+    @primitive
+    def floor_mesh(self):
+        verts = []
+        faces = []
+
+        x = self.separator_outer_r
+        y = 4*self.separator_y+self.clearance
+        z1 = -self.raise_z-1
+        z2 = -self.separator_outer_r-self.clearance
+
+        verts += [(x,y,z1),(-x,y,z1),(-x,-y,z1),(x,-y,z1)]
+        faces += [(0,1,2,3)]
+        verts += [(x,y,z2),(-x,y,z2),(-x,-y,z2),(x,-y,z2)]
+        faces += [(7,6,5,4)]
+        faces += [(1,0,4,5),(2,1,5,6),(3,2,6,7),(0,3,7,4)]
+
+        m = MeshBuilder()
+        m.add_verts(verts)
+        m.add_faces(faces)
+        return m.build()
+
+    def plan_1side(self):
+        # the starting mesh and the boolean steps, as (operation, operands), that turn it into the joint
+        a_h = self.print_angle-self.bendable_angle
+        if a_h <= 0:
+            a_h = math.radians(1)
+        a_u = self.print_angle-self.up_angle
+        if a_u <= 0:
+            a_u = math.radians(1)
+        a_d = self.print_angle-self.down_angle
+        if a_d <= 0:
+            a_d = math.radians(1)
+
+        base = self.arm_space_mesh()
+        union = [
+            self.separator_mesh(self.separator_y,self.separator_outer_r,self.print_angle,self.print_angle,self.print_angle),
+            self.socket_mesh()]
+        difference = [
+            self.separator_mesh(self.separator_y+self.clearance,2*self.separator_outer_r,a_h,a_u,a_d),
+            self.floor_mesh(),
+            self.arm_mesh(),
+            self.axle_mesh()]
+        return base,[("UNION",union),("DIFFERENCE",difference)]
+
+    def plan_2side(self):
+        y = self.separator_y+self.clearance/2
+        left = (0,-y,0)
+        right = (0,y,0)
+
+        base = self.separator_lens_mesh(self.separator_y,self.separator_outer_r,self.bendable_angle,self.up_angle,self.down_angle,y)
+
+        arm_space = self.arm_space_mesh(y+self.clearance/100)
+        socket = self.socket_mesh()
+        union = [
+            arm_space.transformed(offset=left),
+            arm_space.transformed(ROT_Z180,right),
+            socket.transformed(offset=left),
+            socket.transformed(offset=right)]
+
+        arm = self.arm_mesh()
+        axle = self.axle_mesh()
+        difference = [
+            self.floor_mesh(),
+            arm.transformed(offset=left),
+            arm.transformed(ROT_Z180,right),
+            axle.transformed(offset=left),
+            axle.transformed(offset=right)]
+        return base,[("UNION",union),("DIFFERENCE",difference)]
+
+    def plan(self):
+        return self.plan_1side() if self.type == "1SIDE" else self.plan_2side()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import hashlib
+import tomllib
+import numpy as np
+from .geometry import MeshData
+
+# Finished joint meshes on disk, so joints generated in an earlier session load
+# without being generated again. Every joint is a directory named after a hash
+# of its cache key and the add-on version, holding the MeshData arrays as .npy
+# files that are memory-mapped when loaded. Directories are used most recently
+# first, the oldest are removed when the library grows beyond its size limit.
+
+ARRAYS = ("verts","loops","totals")
+KEY_FILE = "key.txt"
+FACES_BEFORE_FILE = "faces_before.txt" # only for reduced joints
+
+def addon_version():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)),"blender_manifest.toml"),"rb") as f:
+        return tomllib.load(f)["version"]
+
+VERSION = addon_version()
+
+def entry_key(key):
+    return repr((VERSION,key))
+
+def entry_path(directory,key):
+    return os.path.join(directory,hashlib.sha1(entry_key(key).encode()).hexdigest())
+
+def contains(directory,key):
+    return os.path.isfile(os.path.join(entry_path(directory,key),KEY_FILE))
+
+def load(directory,key):
+    # the MeshData of a joint, or None if it isn't in the library
+    path = entry_path(directory,key)
+    try:
+        with open(os.path.join(path,KEY_FILE)) as f:
+            if f.read() != entry_key(key):
+                return None
+        arrays = [np.load(os.path.join(path,f"{name}.npy"),mmap_mode='r') for name in ARRAYS]
+        os.utime(path) # most recently used
+    except (OSError,ValueError):
+        return None
+    return MeshData(*arrays)
+
+def faces_before(directory,key):
+    # the number of faces of a reduced joint before it was reduced, None if unknown
+    try:
+        with open(os.path.join(entry_path(directory,key),FACES_BEFORE_FILE)) as f:
+            return int(f.read())
+    except (OSError,ValueError):
+        return None
+
+def store(directory,key,mesh,max_size,faces_before=None):
+    # write the joint next to its final place and move it there in one step, so
+    # a directory is either complete or missing
+    path = entry_path(directory,key)
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(temp,exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(temp,f"{name}.npy"),getattr(mesh,name))
+        with open(os.path.join(temp,KEY_FILE),"w") as f:
+            f.write(entry_key(key))
+        if faces_before is not None:
+            with open(os.path.join(temp,FACES_BEFORE_FILE),"w") as f:
+                f.write(str(faces_before))
+        os.replace(temp,path)
+    except OSError:
+        pass # e.g. stored by another Blender instance in the meantime, or not writable
+    finally:
+        shutil.rmtree(temp,ignore_errors=True)
+    evict(directory,max_size)
+
+def entries(directory):
+    # (last use, size in bytes, path) of every joint in the library
+    result = []
+    for entry in os.scandir(directory):
+        if entry.is_dir() and not entry.name.endswith(".tmp"):
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            result.append((entry.stat().st_mtime,size,entry.path))
+    return result
+
+def size(directory):
+    return sum(size for used,size,path in entries(directory))
+
+def evict(directory,max_size):
+    # remove the least recently used joints until the library fits into max_size bytes
+    joints = sorted(entries(directory))
+    total = sum(size for used,size,path in joints)
+    for used,size,path in joints:
+        if total <= max_size:
+            break
+        shutil.rmtree(path,ignore_errors=True)
+        if not os.path.exists(path): # memory-mapped files can't be removed on Windows
+            total -= size
+
+def clear(directory):
+    evict(directory,0)
@@ -0,0 +1,260 @@
+import math
+import time
+import numpy as np
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+from mathutils.geometry import tessellate_polygon
+from .geometry import MeshData, ROT_Z180
+
+# Range of motion check of a finished joint. The joint mesh is the gap between
+# the two sides of the joint, so its faces are either walls of the fixed side
+# (socket, arm space and separator) or the surface of the moving side (arm, axle
+# and what lies behind the separator), with normals pointing into the material.
+# The moving side is turned about the axle through its allowed angles. At every
+# pose a BVH tree of the turned moving side is overlapped with the one of the
+# walls, which finds the triangles that cross. Only there are points measured for
+# how deep they are, against a contact tolerance: at the ends of its range the arm
+# rests on the arm space, so overlaps shallower than a tenth of the clearance
+# count as touching. The smallest clearance needs the distance of every point, which is
+# kept as a lower bound so that a point is only measured again once it may have
+# come closer than the smallest clearance found so far. Only the surfaces of the
+# joint are compared, not the model it is cut into: beyond the separator the two
+# sides of the model can still run into each other at combined angles.
+
+def triangulated(mesh):
+    # the faces split into triangles of the same orientation; fanning them out from
+    # their first corner doesn't work for the concave n-gons left by the cleanup
+    verts = mesh.verts.astype(np.float64)
+    triangles = []
+    for face in mesh.faces():
+        if len(face) == 3:
+            triangles.append(face)
+            continue
+        corners = verts[list(face)]
+        normal = np.cross(corners,np.roll(corners,-1,axis=0)).sum(axis=0)
+        for a,b,c in tessellate_polygon([[Vector(corner) for corner in corners.tolist()]]):
+            if np.dot(np.cross(corners[b]-corners[a],corners[c]-corners[a]),normal) < 0:
+                b,c = c,b
+            triangles.append((face[a],face[b],face[c]))
+    return MeshData(mesh.verts,np.array(triangles,dtype=np.int32),np.full(len(triangles),3))
+
+def tree(mesh):
+    return BVHTree.FromPolygons(mesh.verts.tolist(),mesh.faces())
+
+def centers(mesh):
+    return np.add.reduceat(mesh.verts[mesh.loops].astype(np.float64),mesh.starts)/mesh.totals[:,None]
+
+def subset(mesh,keep):
+    # the kept faces and only the vertices they use
+    used,loops = np.unique(mesh.loops[np.repeat(keep,mesh.totals)],return_inverse=True)
+    return MeshData(mesh.verts[used],loops.astype(np.int32),mesh.totals[keep])
+
+def nearest(tree,points,search=None):
+    # distances to the nearest faces, positive straight behind a face and otherwise
+    # negative, inf beyond the search distance. Next to an edge the normal of the
+    # nearest face doesn't tell the sides apart, such points count as in front.
+    result = np.full(len(points),math.inf)
+    for i,point in enumerate(points.tolist()):
+        point = Vector(point)
+        location,normal,index,distance = tree.find_nearest(point) if search is None else tree.find_nearest(point,search)
+        if location is not None:
+            result[i] = distance if (point-location).dot(normal) > 0.999*distance > 0 else -distance
+    return result
+
+def components(mesh):
+    # the index of the edge connected part of a triangulated mesh every triangle belongs to
+    triangles = mesh.loops.reshape(-1,3)
+    edges = np.sort(np.stack((triangles,np.roll(triangles,-1,axis=1)),axis=2).reshape(-1,2),axis=1)
+    owner = np.repeat(np.arange(len(triangles)),3)
+    order = np.lexsort((edges[:,1],edges[:,0]))
+    edges,owner = edges[order],owner[order]
+    shared = np.all(edges[1:] == edges[:-1],axis=1)
+    a,b = owner[:-1][shared],owner[1:][shared]
+    labels = np.arange(len(triangles))
+    while True:
+        low = np.minimum(labels[a],labels[b])
+        joined = labels.copy()
+        np.minimum.at(joined,a,low)
+        np.minimum.at(joined,b,low)
+        joined = joined[joined]
+        if np.array_equal(joined,labels):
+            return labels
+        labels = joined
+
+def areas(mesh):
+    a,b,c = mesh.verts[mesh.loops.reshape(-1,3)].astype(np.float64).transpose(1,0,2)
+    return np.linalg.norm(np.cross(b-a,c-a),axis=1)/2
+
+def heights(mesh):
+    # the height of every triangle over its longest edge
+    a,b,c = mesh.verts[mesh.loops.reshape(-1,3)].astype(np.float64).transpose(1,0,2)
+    longest = np.max([np.linalg.norm(b-a,axis=1),np.linalg.norm(c-a,axis=1),np.linalg.norm(c-b,axis=1)],axis=0)
+    return 2*areas(mesh)/np.maximum(longest,1e-12)
+
+def distance(meshes,points,search):
+    # the distance of every point to the nearest of the meshes, inf beyond search
+    return np.min([np.abs(nearest(tree(mesh),points,search)) for mesh in meshes],axis=0)
+
+def split(joint,mesh):
+    # the triangles of the moving side and the walls, and the centre of the axle they turn
+    # about; for two sided joints the left axle, with the right side held at rest
+    mesh = triangulated(mesh)
+    # where two primitives nearly touch the booleans leave strips of triangles narrower
+    # than anything printable, their normals can point either way
+    mesh = subset(mesh,heights(mesh) >= joint.clearance/10)
+    if joint.type == "1SIDE":
+        pivot = np.zeros(3)
+        side = math.inf
+        a_h,a_u,a_d = (max(joint.print_angle-angle,math.radians(1)) for angle in (joint.bendable_angle,joint.up_angle,joint.down_angle))
+        parts = [joint.arm_mesh(),joint.axle_mesh(),
+                 joint.separator_mesh(joint.separator_y+joint.clearance,2*joint.separator_outer_r,a_h,a_u,a_d)]
+    else:
+        y = joint.separator_y+joint.clearance/2
+        pivot = np.array((0.0,-y,0.0))
+        side = 0.0
+        parts = [joint.arm_mesh().transformed(offset=pivot),joint.axle_mesh().transformed(offset=pivot),
+                 joint.arm_mesh().transformed(ROT_Z180,-pivot),joint.axle_mesh().transformed(offset=-pivot)]
+    # Every triangle lies on the primitive it was cut from, or within max_deviation of it
+    # for a reduced joint. The walls are cut from the base and the union of the plan; the
+    # moving side can be closer to a wall than a clearance, so the nearest primitive decides.
+    base,steps = joint.plan()
+    walls = [base]+steps[0][1]
+    center = centers(mesh)
+    to_moving = distance(parts,center,joint.clearance)
+    to_walls = distance(walls,center,joint.clearance)
+    to_floor = distance([joint.floor_mesh()],center,joint.clearance)
+    # the floor and the rim of the separator are outside the model the joint is cut into
+    outside = to_floor <= np.minimum(to_moving,to_walls)
+    outside |= np.hypot(center[:,0],center[:,2]) > joint.separator_outer_r-joint.clearance/2
+    mesh = subset(mesh,~outside)
+    moving = ((to_moving < to_walls)|(center[:,1] > side))[~outside]
+    # Within the model every surface of the gap belongs to one side, where a wall and the
+    # moving side are coplanar the nearest primitive can be either. The surfaces of a side
+    # are only connected through the floor and the rim, the larger area decides.
+    labels = components(mesh)
+    weights = areas(mesh)
+    moving = (np.bincount(labels,weights*moving,len(labels)) > np.bincount(labels,weights,len(labels))/2)[labels]
+    return subset(mesh,moving),subset(mesh,~moving),pivot
+
+def surface_points(mesh,spacing):
+    # points on a triangulated mesh, every point of its surface within spacing of one of
+    # them; long thin triangles get far too many from their grids, one per cell is kept
+    a,b,c = mesh.verts[mesh.loops.reshape(-1,3)].astype(np.float64).transpose(1,0,2)
+    longest = np.max([np.linalg.norm(b-a,axis=1),np.linalg.norm(c-a,axis=1),np.linalg.norm(c-b,axis=1)],axis=0)
+    divisions = np.maximum(1,np.ceil(longest/spacing)).astype(int)
+    points = []
+    for n in np.unique(divisions):
+        i,j = np.meshgrid(np.arange(n+1),np.arange(n+1))
+        keep = i+j <= n
+        u,v = i[keep][:,None]/n,j[keep][:,None]/n
+        same = divisions == n
+        points.append((a[same,None]+(b-a)[same,None]*u+(c-a)[same,None]*v).reshape(-1,3))
+    points = np.concatenate(points)
+    first = np.unique(np.floor(points/(spacing/2)).astype(np.int64),axis=0,return_index=True)[1]
+    return points[np.sort(first)]
+
+def chords(rotations,rotation):
+    # how far a point at distance 1 from the axle moves between each of the rotations and rotation
+    cos = (np.einsum("kij,ij->k",rotations,rotation)-1)/2
+    return 2*np.sin(np.arccos(np.clip(cos,-1.0,1.0))/2)
+
+def poses(joint,step,full_grid=False):
+    # (pitch, yaw) pairs, up is a positive pitch and left a positive yaw
+    def angles(lo,hi):
+        return np.linspace(lo,hi,max(1,math.ceil((hi-lo)/step))+1).tolist()
+    pitches = angles(-joint.down_angle,joint.up_angle)
+    yaws = angles(-joint.bendable_angle,joint.bendable_angle)
+    if full_grid:
+        # back and forth, so that every pose is next to the one before
+        return [(pitch,yaw) for i,pitch in enumerate(pitches) for yaw in (yaws if i%2 == 0 else yaws[::-1])]
+    corners = [(pitch,yaw) for pitch in (pitches[0],pitches[-1]) for yaw in (yaws[0],yaws[-1])]
+    return list(dict.fromkeys([(pitch,0.0) for pitch in pitches]+[(0.0,yaw) for yaw in yaws]+corners))
+
+def sweep(joint,mesh,step=math.radians(2.5),spacing=None,full_grid=False):
+    # the smallest distance between the moving side and the walls over all poses,
+    # and the poses where they collide; mesh is the MeshData of the finished joint
+    start = time.perf_counter()
+    moving,walls,pivot = split(joint,mesh)
+    if not len(moving.totals) or not len(walls.totals):
+        raise RuntimeError("FDMJoint: Joint mesh doesn't match its parameters")
+    # everything relative to the axle, the walls are turned back to meet the moving side
+    body = moving.transformed(offset=-pivot)
+    walls = walls.transformed(offset=-pivot)
+    body_verts,body_faces = body.verts.astype(np.float64),body.faces()
+    wall_tree = tree(walls)
+    body_tree = tree(body)
+    search = 4*joint.clearance
+    tolerance = joint.clearance/10
+    bed = -joint.raise_z-pivot[2]
+    spacing = spacing or max(2*joint.clearance,joint.size/20)
+    points = surface_points(body,spacing)
+    wall_points = surface_points(walls,spacing)
+    # below the bed there is nothing to run into
+    wall_points = wall_points[wall_points[:,2] >= bed]
+    point_r = np.linalg.norm(points,axis=1)
+    wall_r = np.linalg.norm(wall_points,axis=1)
+
+    # a lower bound of the distance of every point to the other side, valid at the pose
+    # it was measured at less the longest path since
+    rotations = [np.identity(3)]
+    def measure(distances):
+        return np.where(distances > 0,0.0,-distances)
+    point_bound = measure(nearest(wall_tree,points))
+    point_at = np.zeros(len(points),dtype=int)
+    wall_bound = measure(nearest(body_tree,wall_points))
+    wall_at = np.zeros(len(wall_points),dtype=int)
+
+    min_clearance = math.inf
+    min_pose = None
+    collisions = []
+    checked = 0
+    for pitch,yaw in poses(joint,step,full_grid):
+        rotation = np.array(Matrix.Rotation(yaw,3,'Z')@Matrix.Rotation(pitch,3,'X'))
+        turned_tree = BVHTree.FromPolygons((body_verts@rotation.T).tolist(),body_faces)
+        crossing = np.array(wall_tree.overlap(turned_tree),dtype=int).reshape(-1,2)
+        moved = chords(np.array(rotations),rotation)
+        pose = len(rotations)
+        rotations.append(rotation)
+        colliding = 0
+        outside = []
+        for side,side_points,r,bound,at,side_tree,turn,column in (
+                (body,points,point_r,point_bound,point_at,wall_tree,rotation.T,1),
+                (walls,wall_points,wall_r,wall_bound,wall_at,body_tree,rotation,0)):
+            # only points that may have come closer than the smallest clearance yet, or
+            # into the other side around the triangles that cross
+            lower = bound-moved[at]*r
+            selected = lower < min(min_clearance,search) if min_clearance > 0 else np.zeros(len(lower),dtype=bool)
+            if len(crossing):
+                corners = side.verts[side.loops.reshape(-1,3)[crossing[:,column]]].reshape(-1,3)
+                around = np.all((side_points >= corners.min(axis=0)-spacing)&(side_points <= corners.max(axis=0)+spacing),axis=1)
+                selected |= around&(lower <= 0)
+            selected = np.flatnonzero(selected)
+            turned = side_points[selected]@turn
+            if side is body:
+                selected,turned = selected[turned[:,2] >= bed],turned[turned[:,2] >= bed]
+            distances = nearest(side_tree,turned)
+            bound[selected] = measure(distances)
+            at[selected] = pose
+            # only where the surfaces cross, deeper than the tolerance
+            if len(crossing):
+                colliding += int((distances > tolerance).sum())
+            outside.append(-distances[distances <= 0])
+        outside = np.concatenate(outside)
+        if len(crossing) and not colliding:
+            # touching, e.g. the arm resting against the end of the arm space
+            outside = np.append(outside,0.0)
+        if len(outside) and outside.min() < min_clearance:
+            min_clearance = float(outside.min())
+            min_pose = (pitch,yaw)
+        checked += 1
+        if colliding:
+            collisions.append({"pitch": pitch,"yaw": yaw,"points": colliding})
+
+    return {
+        "poses": checked,
+        "points": len(points)+len(wall_points),
+        "min_clearance": min_clearance,
+        "min_pose": min_pose,
+        "collisions": collisions,
+        "time": time.perf_counter()-start
+    }
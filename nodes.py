@@ -0,0 +1,425 @@
+import bpy
+import math
+
+# Geometry Nodes version of HPaulsen_FDMJoint. The parameters are inputs of a
+# node group shared by all joints of a type, so the joints stay editable and
+# are evaluated by Blender itself. Parts that are convex are built as convex
+# hulls of the same vertices the Python version uses, the separators are a
+# cylinder minus the convex region below their cone.
+
+GROUP_VERSION = 1
+TYPE_PROP = "fdm_joint_type"
+VERSION_PROP = "fdm_joint_nodes_version"
+
+GROUP_NAMES = {
+    "1SIDE": "FDM Joint 1 Sided",
+    "2SIDE": "FDM Joint 2 Sided"
+}
+
+# name, socket type, subtype, default, min, max and the matching operator property
+INPUTS = [
+    ("Socket Width","NodeSocketFloat","DISTANCE",4.0,2.8,1000.0,"socket_width"),
+    ("Up Angle","NodeSocketFloat","ANGLE",math.radians(22.5),0.0,math.radians(45),"up_angle"),
+    ("Down Angle","NodeSocketFloat","ANGLE",math.radians(22.5),0.0,math.radians(45),"down_angle"),
+    ("Horizontal Angle Limit","NodeSocketFloat","ANGLE",math.radians(45),0.0,math.radians(45),"horizontal_angle"),
+    ("Clearance","NodeSocketFloat","DISTANCE",0.3,0.1,100.0,"clearance"),
+    ("Resolution","NodeSocketInt",None,64,8,1024,"resolution")
+]
+
+_FOLD = {
+    'ADD': lambda a,b: a+b,
+    'SUBTRACT': lambda a,b: a-b,
+    'MULTIPLY': lambda a,b: a*b,
+    'DIVIDE': lambda a,b: a/b,
+    'MAXIMUM': max,
+    'MINIMUM': min,
+    'GREATER_THAN': lambda a,b: float(a > b),
+    'LESS_THAN': lambda a,b: float(a < b),
+    'SINE': math.sin,
+    'COSINE': math.cos,
+    'TANGENT': math.tan,
+    'ARCSINE': math.asin,
+    'SQRT': math.sqrt,
+    'ABSOLUTE': abs,
+    'FLOOR': math.floor
+}
+
+class Socket:
+    # an output socket that supports arithmetic, creating math nodes as needed
+    def __init__(self,graph,socket,depth):
+        self.graph = graph
+        self.socket = socket
+        self.depth = depth
+
+    def __add__(self,other): return self.graph.math('ADD',self,other)
+    def __radd__(self,other): return self.graph.math('ADD',other,self)
+    def __sub__(self,other): return self.graph.math('SUBTRACT',self,other)
+    def __rsub__(self,other): return self.graph.math('SUBTRACT',other,self)
+    def __mul__(self,other): return self.graph.math('MULTIPLY',self,other)
+    def __rmul__(self,other): return self.graph.math('MULTIPLY',other,self)
+    def __truediv__(self,other): return self.graph.math('DIVIDE',self,other)
+    def __rtruediv__(self,other): return self.graph.math('DIVIDE',other,self)
+    def __neg__(self): return self.graph.math('MULTIPLY',self,-1.0)
+
+class Graph:
+    def __init__(self,tree):
+        self.tree = tree
+        self.rows = {}
+        self.depths = {}
+
+    def node(self,type,inputs=(),**props):
+        node = self.tree.nodes.new(type)
+        for name,value in props.items():
+            setattr(node,name,value)
+        depth = 0
+        for key,value in inputs:
+            if value is None:
+                continue
+            for item in (value if isinstance(value,list) else [value]):
+                if isinstance(item,Socket):
+                    self.tree.links.new(item.socket,node.inputs[key])
+                    depth = max(depth,item.depth+1)
+                else:
+                    node.inputs[key].default_value = item
+        # lay the nodes out in columns by how far they are from the inputs
+        row = self.rows.get(depth,0)
+        self.rows[depth] = row+1
+        node.location = (250*depth,-200*row)
+        self.depths[node.name] = depth
+        return node
+
+    def output(self,node,key=0):
+        return Socket(self,node.outputs[key],self.depths[node.name])
+
+    def math(self,operation,*args):
+        if all(not isinstance(arg,Socket) for arg in args):
+            return _FOLD[operation](*args)
+        node = self.node('ShaderNodeMath',list(enumerate(args)),operation=operation)
+        return self.output(node)
+
+    def sin(self,a): return self.math('SINE',a)
+    def cos(self,a): return self.math('COSINE',a)
+    def tan(self,a): return self.math('TANGENT',a)
+    def asin(self,a): return self.math('ARCSINE',self.min(self.max(a,-1.0),1.0))
+    def sqrt(self,a): return self.math('SQRT',self.max(a,0.0))
+    def abs(self,a): return self.math('ABSOLUTE',a)
+    def floor(self,a): return self.math('FLOOR',a)
+    def max(self,a,b): return self.math('MAXIMUM',a,b)
+    def min(self,a,b): return self.math('MINIMUM',a,b)
+    def gt(self,a,b): return self.math('GREATER_THAN',a,b)
+    def lt(self,a,b): return self.math('LESS_THAN',a,b)
+
+    def where(self,condition,a,b):
+        # a where condition is 1, b where it is 0; both sides must be finite
+        return a*condition+b*(1-condition)
+
+    def xyz(self,x,y,z):
+        return self.output(self.node('ShaderNodeCombineXYZ',[("X",x),("Y",y),("Z",z)]))
+
+    def separate(self,vector):
+        node = self.node('ShaderNodeSeparateXYZ',[("Vector",vector)])
+        return self.output(node,"X"),self.output(node,"Y"),self.output(node,"Z")
+
+    def position(self):
+        return self.output(self.node('GeometryNodeInputPosition'))
+
+    def index(self):
+        return self.output(self.node('GeometryNodeInputIndex'))
+
+    def points(self,position,count=1):
+        return self.output(self.node('GeometryNodePoints',[("Count",count),("Position",position)]))
+
+    def circle(self,vertices,radius):
+        # in the xy plane, starting on the x axis
+        return self.output(self.node('GeometryNodeMeshCircle',[("Vertices",vertices),("Radius",radius)]))
+
+    def cylinder(self,vertices,radius,depth):
+        return self.output(self.node('GeometryNodeMeshCylinder',[("Vertices",vertices),("Radius",radius),("Depth",depth)]))
+
+    def transform(self,geometry,translation=None,rotation=None):
+        return self.output(self.node('GeometryNodeTransform',[("Geometry",geometry),("Translation",translation),("Rotation",rotation)]))
+
+    def set_position(self,geometry,position=None,offset=None,selection=None):
+        return self.output(self.node('GeometryNodeSetPosition',
+                                     [("Geometry",geometry),("Selection",selection),("Position",position),("Offset",offset)]))
+
+    def join(self,geometries):
+        # the multi-input socket keeps the last link first
+        return self.output(self.node('GeometryNodeJoinGeometry',[("Geometry",geometries[::-1])]))
+
+    def hull(self,geometry):
+        return self.output(self.node('GeometryNodeConvexHull',[("Geometry",geometry)]))
+
+    def boolean(self,operation,mesh1,mesh2):
+        node = self.node('GeometryNodeMeshBoolean',[("Mesh 1",mesh1),("Mesh 2",mesh2[::-1])],operation=operation)
+        try:
+            node.solver = 'MANIFOLD'
+        except TypeError:
+            node.solver = 'EXACT' # Blender versions without the Manifold solver in the node
+        return self.output(node)
+
+class Joint:
+    # the derived quantities of JointGeometry.__init__ as node outputs
+    def __init__(self,g,size,up_angle,down_angle,horizontal_angle,clearance,resolution):
+        self.g = g
+        self.size = size
+        self.up_angle = up_angle
+        self.down_angle = down_angle
+        self.clearance = clearance
+        self.resolution = resolution
+
+        self.overlap = 0.3
+        self.print_angle = math.radians(45)
+        self.half_arm_width = g.max(0.6,0.3*size/2)
+        self.wall_width = g.max(0.8,0.25*size/2)
+        self.bridgeable_r = 1.5
+
+        self.axle_min_r = g.max(0.4,size/6)
+        self.axle_major_r = size/2-clearance
+        self.axle_x = g.sqrt(self.axle_major_r*self.axle_major_r-self.axle_min_r*self.axle_min_r)
+        self.axle_r = self.axle_min_r+(self.axle_x-self.half_arm_width)/math.tan(self.print_angle)
+
+        self.v_clearance = 0.6
+        self.v_clearance_max = 2
+        self.bottom = 1.5*size
+        self.arm_length = size/2+self.wall_width+2*clearance
+        self.separator_outer_r = 2*size
+        self.separator_y = size/2+self.wall_width
+
+        bendable_angle = g.asin((self.axle_x-self.overlap-self.half_arm_width)/(size/2+clearance))
+        self.bendable_angle = g.min(g.max(bendable_angle,0.0),horizontal_angle)
+        self.raise_z = 1.5*self.axle_r
+
+    def socket_top(self):
+        g = self.g
+        top = self.axle_r+self.v_clearance
+        topr = self.size/2-(top-self.axle_min_r)
+        d = topr-self.bridgeable_r
+        far = g.gt(d,self.v_clearance_max)
+        capped_top = g.where(far,self.axle_r+self.v_clearance_max,top+d)
+        capped_topr = g.where(far,self.size/2-(self.axle_r+self.v_clearance_max-self.axle_min_r),self.bridgeable_r)
+        wide = g.gt(topr,self.bridgeable_r)
+        return g.where(wide,capped_top,top),g.where(wide,capped_topr,topr)
+
+    def ring_z(self,r,z):
+        g = self.g
+        return g.transform(g.circle(self.resolution,r),translation=g.xyz(0.0,0.0,z))
+
+    def ring_x(self,r,x):
+        g = self.g
+        return g.transform(g.circle(self.resolution,r),translation=g.xyz(x,0.0,0.0),rotation=(0.0,math.pi/2,0.0))
+
+    def hull_of(self,points):
+        g = self.g
+        return g.hull(g.join([g.points(g.xyz(*point)) for point in points]))
+
+    def socket(self):
+        g = self.g
+        top,topr = self.socket_top()
+        return g.hull(g.join([
+            g.points(g.xyz(0.0,0.0,-self.axle_min_r-self.size/2)),
+            self.ring_z(self.size/2,-self.axle_min_r),
+            self.ring_z(self.size/2,self.axle_min_r),
+            self.ring_z(topr,top)]))
+
+    def axle(self):
+        g = self.g
+        straight_x = g.max(self.axle_x-(self.axle_r-self.axle_min_r),self.half_arm_width+0.0001)
+        def lowered(ring):
+            below = g.lt(g.separate(g.position())[2],0.0)
+            return g.set_position(ring,offset=g.xyz(0.0,0.0,self.half_arm_width-straight_x),selection=below)
+        return g.hull(g.join([
+            self.ring_x(self.axle_min_r,-self.axle_x),
+            self.ring_x(self.axle_r,-straight_x),
+            lowered(self.ring_x(self.axle_r,-self.half_arm_width)),
+            lowered(self.ring_x(self.axle_r,self.half_arm_width)),
+            self.ring_x(self.axle_r,straight_x),
+            self.ring_x(self.axle_min_r,self.axle_x)]))
+
+    def arm(self):
+        x = self.half_arm_width
+        arm_start_z = self.axle_r*math.cos(self.print_angle)+self.axle_x-self.half_arm_width-(self.axle_r-self.axle_min_r)
+        arm_start_y = self.axle_r*math.sin(self.print_angle)
+        d = self.arm_length+arm_start_y
+        points = []
+        for sx in (-x,x):
+            points += [(sx,0.0,self.axle_min_r),(sx,self.arm_length,self.axle_min_r),
+                       (sx,-arm_start_y,-arm_start_z),(sx,-arm_start_y+d,-arm_start_z-d)]
+        return self.hull_of(points)
+
+    def arm_space(self,depth=0):
+        g = self.g
+        r = self.axle_major_r+self.clearance
+        a = self.down_angle-self.print_angle
+        y = -r*g.cos(a)
+        x = self.half_arm_width+self.clearance-y*g.sin(self.bendable_angle)
+        y = y*g.cos(self.bendable_angle)
+        z = r*g.sin(a)
+        points = [(-x,y,z),(x,y,z)]
+        h = self.bottom+z
+        y = y-h*g.tan(a)
+        # the Python version adds points at y=0 on the bottom when y < 0, otherwise
+        # these coincide with the bottom corners
+        for y_bottom in (y,g.max(y,0.0)):
+            x = self.half_arm_width+self.clearance+g.abs(y_bottom*g.sin(self.bendable_angle))
+            points += [(-x,y_bottom,-self.bottom),(x,y_bottom,-self.bottom)]
+
+        x = self.half_arm_width+self.clearance
+        points += [(-x,0.0,self.axle_min_r),(x,0.0,self.axle_min_r)]
+
+        y = depth if depth else self.arm_length-self.clearance
+        x = g.max(y*g.tan(self.bendable_angle)+self.half_arm_width,self.half_arm_width+self.clearance)
+        z_far_top = self.axle_min_r+y*g.tan(self.up_angle)
+        points += [(-x,y,z_far_top),(x,y,z_far_top),(-x,y,-self.bottom),(x,y,-self.bottom)]
+        points += [(0.0,0.0,self.axle_min_r+(self.clearance+self.half_arm_width)*math.tan(self.print_angle)),
+                   (0.0,y,z_far_top+x*math.tan(self.print_angle))]
+        return self.hull_of(points)
+
+    def floor(self):
+        x = self.separator_outer_r
+        y = 4*self.separator_y+self.clearance
+        z1 = -self.raise_z-1
+        z2 = -self.separator_outer_r-self.clearance
+        return self.hull_of([(sx,sy,z) for sx in (-x,x) for sy in (-y,y) for z in (z1,z2)])
+
+    def recess(self,tip_y,xz_radius,h_angle,up_angle,down_angle):
+        # the convex region below the cone side of a separator, reaching past its cylinder
+        g = self.g
+        final_up_r = tip_y*g.sin(up_angle)
+        final_up_y = tip_y*g.cos(up_angle)
+        final_h_r = tip_y*g.sin(h_angle)
+        final_h_y = tip_y*g.cos(h_angle)
+        final_down_r = tip_y*g.sin(down_angle)
+        final_down_y = tip_y*g.cos(down_angle)
+
+        # the large side of the cone, see JointGeometry.separator_surface
+        def cone_y(d,final_r,final_y,angle):
+            return g.where(g.lt(d,final_r),g.sqrt(tip_y*tip_y-d*d),final_y-(d-final_r)*g.tan(angle))
+        x,z,_ = g.separate(g.position())
+        ax = g.abs(x)
+        az = g.abs(z)
+        upper = g.gt(z,-1e-6)
+        y_h = cone_y(ax,final_h_r,final_h_y,h_angle)
+        y_v = g.where(upper,cone_y(az,final_up_r,final_up_y,up_angle),cone_y(az,final_down_r,final_down_y,down_angle))
+        y = tip_y-(tip_y-y_h)*ax/xz_radius-(tip_y-y_v)*az/xz_radius
+        large = g.set_position(g.circle(self.resolution,xz_radius),position=g.xyz(x,y,z))
+        # continued outwards along the cone so it crosses the cylinder wall cleanly
+        x,y,z = g.separate(g.position())
+        extended = g.set_position(large,position=g.xyz(1.1*x,tip_y+1.1*(y-tip_y),1.1*z))
+        x,y,z = g.separate(g.position())
+        below = g.set_position(extended,position=g.xyz(x,-5*xz_radius,z))
+
+        # the small side of the cone and the rings on the sphere
+        a_h_max = g.max(g.asin(final_h_r/tip_y),0.001)
+        a_up_max = g.asin(final_up_r/tip_y)
+        a_down_max = g.asin(final_down_r/tip_y)
+        max_angle = g.max(g.max(a_h_max,a_up_max),a_down_max)
+        num_rings = g.max(g.floor(max_angle*self.resolution/(2*math.pi)),1.0)
+        index = g.index()
+        ring = g.floor(index/self.resolution)
+        j = index-ring*self.resolution
+        scale = (num_rings-ring)/num_rings
+        upper = g.lt(j,self.resolution/2)
+        j = j-(1-upper)*self.resolution/2
+        ah = a_h_max*scale
+        a = -ah+j*4*ah/self.resolution
+        b = g.where(upper,a_up_max,a_down_max)*scale*g.cos(a/ah*math.pi/2)
+        sign = 2*upper-1
+        sphere = g.points(g.xyz(sign*tip_y*g.cos(b)*g.sin(a),tip_y*g.cos(b)*g.cos(a),sign*tip_y*g.sin(b)),
+                          count=num_rings*self.resolution)
+
+        tip = g.points(g.xyz(0.0,tip_y,0.0))
+        return g.hull(g.join([large,extended,below,sphere,tip]))
+
+    def cylinder(self,xz_radius):
+        # along y, turned half a segment so its edges don't meet the recess rings
+        g = self.g
+        return g.transform(g.cylinder(self.resolution,xz_radius,8*xz_radius),
+                           rotation=g.xyz(math.pi/2,g.math('DIVIDE',math.pi,self.resolution),0.0))
+
+    def separator(self,tip_y,xz_radius,h_angle,up_angle,down_angle):
+        g = self.g
+        return g.boolean('DIFFERENCE',self.cylinder(xz_radius),[self.recess(tip_y,xz_radius,h_angle,up_angle,down_angle)])
+
+    def separator_lens(self,tip_y,xz_radius,h_angle,up_angle,down_angle,offset):
+        g = self.g
+        recess = self.recess(tip_y,xz_radius,h_angle,up_angle,down_angle)
+        return g.boolean('DIFFERENCE',self.cylinder(xz_radius),[
+            g.transform(recess,translation=g.xyz(0.0,-offset,0.0)),
+            g.transform(recess,translation=g.xyz(0.0,offset,0.0),rotation=(0.0,0.0,math.pi))])
+
+    def joint1side(self):
+        g = self.g
+        def limit(a):
+            return g.where(g.gt(a,0.0),a,math.radians(1))
+        a_h = limit(self.print_angle-self.bendable_angle)
+        a_u = limit(self.print_angle-self.up_angle)
+        a_d = limit(self.print_angle-self.down_angle)
+        union = g.boolean('UNION',None,[
+            self.arm_space(),
+            self.separator(self.separator_y,self.separator_outer_r,self.print_angle,self.print_angle,self.print_angle),
+            self.socket()])
+        return g.boolean('DIFFERENCE',union,[
+            self.separator(self.separator_y+self.clearance,2*self.separator_outer_r,a_h,a_u,a_d),
+            self.floor(),
+            self.arm(),
+            self.axle()])
+
+    def joint2side(self):
+        g = self.g
+        y = self.separator_y+self.clearance/2
+        left = g.xyz(0.0,-y,0.0)
+        right = g.xyz(0.0,y,0.0)
+        rot180 = (0.0,0.0,math.pi)
+        arm_space = self.arm_space(y+self.clearance/100)
+        socket = self.socket()
+        arm = self.arm()
+        axle = self.axle()
+        union = g.boolean('UNION',None,[
+            self.separator_lens(self.separator_y,self.separator_outer_r,self.bendable_angle,self.up_angle,self.down_angle,y),
+            g.transform(arm_space,translation=left),
+            g.transform(arm_space,translation=right,rotation=rot180),
+            g.transform(socket,translation=left),
+            g.transform(socket,translation=right)])
+        return g.boolean('DIFFERENCE',union,[
+            self.floor(),
+            g.transform(arm,translation=left),
+            g.transform(arm,translation=right,rotation=rot180),
+            g.transform(axle,translation=left),
+            g.transform(axle,translation=right)])
+
+def build_group(type):
+    tree = bpy.data.node_groups.new(GROUP_NAMES[type],'GeometryNodeTree')
+    tree[TYPE_PROP] = type
+    tree[VERSION_PROP] = GROUP_VERSION
+    tree.interface.new_socket("Geometry",in_out='OUTPUT',socket_type='NodeSocketGeometry')
+    for name,socket_type,subtype,default,min_value,max_value,prop in INPUTS:
+        socket = tree.interface.new_socket(name,in_out='INPUT',socket_type=socket_type)
+        socket.default_value = default
+        socket.min_value = min_value
+        socket.max_value = max_value
+        if subtype:
+            socket.subtype = subtype
+
+    g = Graph(tree)
+    inputs = g.node('NodeGroupInput')
+    joint = Joint(g,*[g.output(inputs,name) for name,*rest in INPUTS])
+    result = joint.joint1side() if type == "1SIDE" else joint.joint2side()
+    result = g.transform(result,translation=g.xyz(0.0,0.0,joint.raise_z))
+    g.node('NodeGroupOutput',[("Geometry",result)])
+    return tree
+
+def joint_group(type):
+    # all joints of a type share one node group
+    for tree in bpy.data.node_groups:
+        if tree.get(TYPE_PROP) == type and tree.get(VERSION_PROP) == GROUP_VERSION:
+            return tree
+    return build_group(type)
+
+def set_inputs(modifier,values):
+    # values maps operator property names to values
+    for item in modifier.node_group.interface.items_tree:
+        if item.item_type == 'SOCKET' and item.in_out == 'INPUT':
+            for name,*rest,prop in INPUTS:
+                if name == item.name and prop in values:
+                    modifier[item.identifier] = values[prop]
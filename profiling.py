@@ -0,0 +1,88 @@
+import time
+import json
+import contextlib
+
+# Opt-in timings of joint generation. A Profile records the wall time of every
+# stage of one joint, with the size of what it produced, and finished profiles
+# are added to a running aggregate for the session.
+
+_session = {} # stage -> [count, total time, max time]
+_joints = 0
+_last = None
+
+class Profile:
+    def __init__(self,params):
+        self.params = params
+        self.stages = [] # in the order they finished, nested stages before their parent
+        self.depth = 0
+
+    @contextlib.contextmanager
+    def stage(self,name,**info):
+        # info may be extended inside the block
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield info
+        finally:
+            self.depth -= 1
+            self.stages.append(dict(stage=name,depth=self.depth,time=time.perf_counter()-start,**info))
+
+    def total(self):
+        return sum(stage["time"] for stage in self.stages if stage["depth"] == 0)
+
+    def to_dict(self):
+        return {"params": self.params,"total": self.total(),"stages": self.stages}
+
+def instrument(obj,names,profile):
+    # time the given methods of one instance as stages, recording the size of
+    # meshes they return and merging dicts they return
+    for name in names:
+        method = getattr(obj,name)
+        def wrapper(*args,_method=method,_name=name,**kwargs):
+            with profile.stage(_name) as info:
+                result = _method(*args,**kwargs)
+                if hasattr(result,"totals"):
+                    info["verts"] = len(result.verts)
+                    info["faces"] = len(result.totals)
+                elif isinstance(result,dict):
+                    info.update(result)
+                return result
+        setattr(obj,name,wrapper)
+
+def finish(profile):
+    global _joints,_last
+    for stage in profile.stages:
+        entry = _session.setdefault(stage["stage"],[0,0.0,0.0])
+        entry[0] += 1
+        entry[1] += stage["time"]
+        entry[2] = max(entry[2],stage["time"])
+    _joints += 1
+    _last = profile
+
+def last():
+    return _last
+
+def aggregate():
+    # stage -> count, total, mean and max time, slowest total first
+    stages = sorted(_session.items(),key=lambda item: -item[1][1])
+    return {name: {"count": count,"total": total,"mean": total/count,"max": longest}
+            for name,(count,total,longest) in stages}
+
+def joints():
+    return _joints
+
+def report():
+    return {
+        "last": _last.to_dict() if _last else None,
+        "session": {"joints": _joints,"stages": aggregate()}
+    }
+
+def export(path):
+    with open(path,"w") as f:
+        json.dump(report(),f,indent=1)
+
+def reset():
+    global _joints,_last
+    _session.clear()
+    _joints = 0
+    _last = None
@@ -0,0 +1,110 @@
+import os
+import json
+import math
+import hashlib
+import importlib.util
+import numpy as np
+import pytest
+
+# Checks of the geometry kernel, which runs without Blender:
+#   python -m pytest tests
+# data/reference_primitives.json holds the primitives of the original bpy based
+# generator (the baseline commit) over 504 parameter combinations: vertex count,
+# a hash of the faces and two vertex moments of every primitive.
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_geometry():
+    spec = importlib.util.spec_from_file_location("fdm_joints_geometry",os.path.join(ADDON_DIR,"geometry.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+geometry = load_geometry()
+
+with open(os.path.join(ADDON_DIR,"tests","data","reference_primitives.json")) as f:
+    REFERENCE = json.load(f)["combinations"]
+
+# chord tolerance mode: (type, size, clearance, resolution, tolerance in mm)
+TOLERANCE_CASES = [(type,size,0.3,resolution,tolerance) for type in ("1SIDE","2SIDE") for size in (4,10,20)
+                   for resolution in (32,128) for tolerance in (0.02,0.1,0.4)]
+
+def joint(params,tolerance=None):
+    type,size,up,down,horizontal,clearance,resolution = params
+    return geometry.JointGeometry(type,size,math.radians(up),math.radians(down),math.radians(horizontal),clearance,resolution,tolerance)
+
+def tolerance_joint(case):
+    type,size,clearance,resolution,tolerance = case
+    return joint((type,size,22.5,22.5,45,clearance,resolution),tolerance)
+
+def primitives(j):
+    c = j.clearance
+    return {
+        "socket": j.socket_mesh(),
+        "axle": j.axle_mesh(),
+        "arm": j.arm_mesh(),
+        "arm_space": j.arm_space_mesh(),
+        "arm_space_deep": j.arm_space_mesh(3.3),
+        "floor": j.floor_mesh(),
+        "separator": j.separator_mesh(j.separator_y,j.separator_outer_r,j.bendable_angle,j.up_angle,j.down_angle),
+        "separator_large": j.separator_mesh(j.separator_y+c,2*j.separator_outer_r,math.radians(1),math.radians(20),math.radians(1))
+    }
+
+def features(mesh):
+    verts = mesh.verts.astype(np.float64)
+    n = len(verts)
+    faces = hashlib.sha1(repr(sorted(mesh.faces())).encode()).hexdigest()[:16]
+    return n,faces,verts.sum(axis=0),(verts*np.arange(1,n+1)[:,None]).sum(axis=0)/n
+
+@pytest.mark.parametrize("combination",REFERENCE,ids=lambda combination: "-".join(str(value) for value in combination["params"]))
+def test_matches_original_generator(combination):
+    for name,mesh in primitives(joint(combination["params"])).items():
+        n,faces,total,moment = features(mesh)
+        ref_n,ref_faces,ref_total,ref_moment = combination["primitives"][name]
+        assert n == ref_n,name
+        assert faces == ref_faces,name
+        # float32 coordinates, within 1e-5 per vertex
+        assert np.allclose(total,ref_total,rtol=0,atol=1e-5*n),name
+        assert np.allclose(moment,ref_moment,rtol=0,atol=1e-5*n),name
+
+def test_infeasible_combinations_are_rejected():
+    feasible = {tuple(combination["params"]) for combination in REFERENCE}
+    for type in ("1SIDE","2SIDE"):
+        for size in (2.9,4,6,10,20):
+            for clearance in (0.1,0.3,0.5):
+                for up,down,horizontal in ((22.5,22.5,45),(0,45,30),(45,0,10)):
+                    params = (type,size,up,down,horizontal,clearance,8)
+                    if params in feasible:
+                        continue
+                    with pytest.raises(RuntimeError):
+                        joint(params)
+
+def assert_watertight(j):
+    # every mesh going into the booleans is closed, manifold and consistently oriented,
+    # also after disjoint operands are packed together
+    base,steps = j.plan()
+    meshes = [base]+[mesh for operation,operands in steps for mesh in operands+geometry.pack_disjoint(operands)]
+    for mesh in meshes:
+        assert geometry.edge_stats(mesh) == {"boundary": 0,"non_manifold": 0,"inconsistent": 0}
+
+@pytest.mark.parametrize("combination",REFERENCE,ids=lambda combination: "-".join(str(value) for value in combination["params"]))
+def test_boolean_operands_are_watertight(combination):
+    assert_watertight(joint(combination["params"]))
+
+@pytest.mark.parametrize("case",TOLERANCE_CASES,ids=lambda case: "-".join(str(value) for value in case))
+def test_tolerance_operands_are_watertight(case):
+    assert_watertight(tolerance_joint(case))
+
+@pytest.mark.parametrize("case",TOLERANCE_CASES,ids=lambda case: "-".join(str(value) for value in case))
+def test_tolerance_segments(case):
+    # more segments for larger radii, a multiple of 4 between 8 and the resolution
+    j = tolerance_joint(case)
+    counts = [j.segments(r) for r in np.geomspace(0.01,1e6,300)]
+    assert counts == sorted(counts)
+    assert all(n%4 == 0 and 8 <= n <= j.resolution for n in counts)
+    assert counts[0] == 8
+    assert counts[-1] == j.resolution
+
+def test_resolution_mode_segments():
+    j = joint(("1SIDE",6,22.5,22.5,45,0.3,48))
+    assert {j.segments(r) for r in np.geomspace(0.01,100,50)} == {48}
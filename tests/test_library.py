@@ -0,0 +1,95 @@
+import os
+import sys
+import types
+import importlib.util
+import numpy as np
+import pytest
+
+# Checks of the joint library, which runs without Blender:
+#   python -m pytest tests
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_library():
+    # library.py imports geometry.py relatively, load both into a package without
+    # running the add-on's __init__.py
+    package = types.ModuleType("fdm_joints_library")
+    package.__path__ = [ADDON_DIR]
+    sys.modules[package.__name__] = package
+    for name in ("geometry","library"):
+        spec = importlib.util.spec_from_file_location(f"{package.__name__}.{name}",os.path.join(ADDON_DIR,f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    return module
+
+library = load_library()
+geometry = sys.modules["fdm_joints_library.geometry"]
+
+def joint_key(size):
+    return ("1SIDE",size,0.392699,0.392699,0.785398,0.3,16,None,0.0)
+
+def mesh(size):
+    return geometry.JointGeometry("1SIDE",size,0.392699,0.392699,0.785398,0.3,16).socket_mesh()
+
+def test_round_trip(tmp_path):
+    data = mesh(6)
+    assert library.load(tmp_path,joint_key(6)) is None
+    library.store(tmp_path,joint_key(6),data,10**9,1234)
+    assert library.contains(tmp_path,joint_key(6))
+    loaded = library.load(tmp_path,joint_key(6))
+    for name in library.ARRAYS:
+        assert np.array_equal(getattr(loaded,name),getattr(data,name))
+    assert library.faces_before(tmp_path,joint_key(6)) == 1234
+    assert library.load(tmp_path,joint_key(8)) is None
+
+def test_faces_before_only_for_reduced_joints(tmp_path):
+    library.store(tmp_path,joint_key(6),mesh(6),10**9)
+    assert library.faces_before(tmp_path,joint_key(6)) is None
+
+def test_failed_store_leaves_no_entry(tmp_path,monkeypatch):
+    # a write failing halfway leaves neither the entry nor its temporary directory
+    save = np.save
+    def failing_save(path,array):
+        if path.endswith("loops.npy"):
+            raise OSError("disk full")
+        save(path,array)
+    monkeypatch.setattr(library.np,"save",failing_save)
+    library.store(tmp_path,joint_key(6),mesh(6),10**9)
+    assert os.listdir(tmp_path) == []
+    assert library.load(tmp_path,joint_key(6)) is None
+
+def test_temporary_directories_are_not_entries(tmp_path):
+    library.store(tmp_path,joint_key(6),mesh(6),10**9)
+    os.makedirs(os.path.join(tmp_path,"abc.123.tmp"))
+    assert [path for used,size,path in library.entries(tmp_path)] == [library.entry_path(tmp_path,joint_key(6))]
+
+def test_least_recently_used_are_evicted(tmp_path):
+    for i,size in enumerate((4,6,8)):
+        library.store(tmp_path,joint_key(size),mesh(size),10**9)
+        os.utime(library.entry_path(tmp_path,joint_key(size)),(1000+i,1000+i))
+    # loading the oldest makes it the most recently used
+    assert library.load(tmp_path,joint_key(4)) is not None
+    sizes = {path: size for used,size,path in library.entries(tmp_path)}
+    keep = sizes[library.entry_path(tmp_path,joint_key(4))]+sizes[library.entry_path(tmp_path,joint_key(8))]
+    library.evict(tmp_path,keep)
+    assert library.contains(tmp_path,joint_key(4))
+    assert not library.contains(tmp_path,joint_key(6))
+    assert library.contains(tmp_path,joint_key(8))
+    library.clear(tmp_path)
+    assert library.size(tmp_path) == 0
+
+def test_store_evicts_beyond_the_size_limit(tmp_path):
+    library.store(tmp_path,joint_key(4),mesh(4),10**9)
+    os.utime(library.entry_path(tmp_path,joint_key(4)),(1000,1000))
+    limit = library.size(tmp_path) # room for one joint
+    library.store(tmp_path,joint_key(6),mesh(6),limit)
+    assert not library.contains(tmp_path,joint_key(4))
+    assert library.contains(tmp_path,joint_key(6))
+    assert library.size(tmp_path) <= limit
+
+def test_new_version_misses_old_entries(tmp_path,monkeypatch):
+    library.store(tmp_path,joint_key(6),mesh(6),10**9)
+    monkeypatch.setattr(library,"VERSION","0.0.0-other")
+    assert not library.contains(tmp_path,joint_key(6))
+    assert library.load(tmp_path,joint_key(6)) is None